@@ -2,6 +2,7 @@ import streamlit as st
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from config.settings import DATABASE_URL
+from utils.compression import decompress
 import logging
 from datetime import timedelta
 import os
@@ -155,11 +156,11 @@ def main():
             # 顯示圖片
             image_id = item['integrated_image_id'] if item['integrated_image_id'] else item['png_file_id']
             if image_id:
-                image_query = "SELECT data, content_type FROM files WHERE id = %s"
+                image_query = "SELECT data, content_type, encoding FROM files WHERE id = %s"
                 image_data = run_binary_query(image_query, (image_id,))
                 if image_data and image_data['data']:
                     try:
-                        image = Image.open(BytesIO(bytes(image_data['data'])))
+                        image = Image.open(BytesIO(decompress(image_data['data'], image_data['encoding'])))
                         st.image(image, caption="新聞相關圖片")
                     except Exception as e:
                         st.error(f"無法載入圖片: {e}")
@@ -190,11 +191,11 @@ def main():
 
             # 提供 Markdown 文件下載
             if item['md_file_id']:
-                md_query = "SELECT data FROM files WHERE id = %s"
+                md_query = "SELECT data, encoding FROM files WHERE id = %s"
                 md_data = run_binary_query(md_query, (item['md_file_id'],))
                 if md_data and md_data['data']:
                     try:
-                        md_content = bytes(md_data['data']).decode('utf-8')
+                        md_content = decompress(md_data['data'], md_data['encoding']).decode('utf-8')
                         md_filename = f"news_{item['id']}.md"
                         st.download_button(
                             label="下載完整內容 (Markdown)",
@@ -1,3 +1,4 @@
+import logging
 import os
 import yaml
 from dotenv import load_dotenv
@@ -54,6 +55,131 @@ if DATABASE_URL.startswith("postgres://"):
 # 其他設置
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', config['openai']['api_key'])
 JINA_API_URL = os.getenv('JINA_API_URL', config['jina']['api_url'])
+OPENAI_BASE_URL = config['openai']['base_url']
+OPENAI_TIMEOUT = float(config['openai']['timeout'])
+IMGUR_API_URL = config['imgur']['api_url']
+GRAPH_API_URL = config['graph_api']['api_url']
+
+# 外部 API 替身設置，standin 模式下依序使用 base_port 起的連續埠號
+API_PROFILE = config['standin']['profile']
+STANDIN_HOST = config['standin']['host']
+STANDIN_BASE_PORT = int(config['standin']['base_port'])
+STANDIN_PORTS = {
+    'openai': STANDIN_BASE_PORT,
+    'jina': STANDIN_BASE_PORT + 1,
+    'imgur': STANDIN_BASE_PORT + 2,
+    'graph': STANDIN_BASE_PORT + 3,
+    'feed': STANDIN_BASE_PORT + 4,
+}
+# 設定時 RSS Feed 改經由替身伺服器取得，網址接在其後（與 Jina Reader 相同的形式）
+FEED_STANDIN_URL = None
+if API_PROFILE == 'standin':
+    OPENAI_BASE_URL = f"http://{STANDIN_HOST}:{STANDIN_PORTS['openai']}/v1"
+    JINA_API_URL = f"http://{STANDIN_HOST}:{STANDIN_PORTS['jina']}"
+    IMGUR_API_URL = f"http://{STANDIN_HOST}:{STANDIN_PORTS['imgur']}"
+    GRAPH_API_URL = f"http://{STANDIN_HOST}:{STANDIN_PORTS['graph']}"
+    FEED_STANDIN_URL = f"http://{STANDIN_HOST}:{STANDIN_PORTS['feed']}"
+    OPENAI_API_KEY = OPENAI_API_KEY or 'standin'
+    # 發布貼文所需的憑證，替身伺服器不檢查內容；已設定的值不會被覆蓋
+    for name in ('IMGUR_CLIENT_ID', 'IMGUR_CLIENT_SECRET', 'INSTAGRAM_ACCOUNT_ID', 'INSTAGRAM_ACCESS_TOKEN'):
+        os.environ.setdefault(name, 'standin')
+
+# HTTP 錄製/重播設置
+HTTP_CASSETTE_MODE = config['standin']['cassette_mode']
+HTTP_CASSETTE_PATH = config['standin']['cassette_path']
+
+# HTTP 連線池設置
+HTTP2_ENABLED = str(config['http']['http2']).lower() == 'true'
+HTTP_TIMEOUT = float(config['http']['timeout'])
+HTTP_CONNECT_TIMEOUT = float(config['http']['connect_timeout'])
+HTTP_MAX_CONNECTIONS = int(config['http']['max_connections'])
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(config['http']['max_keepalive_connections'])
+HTTP_KEEPALIVE_EXPIRY = float(config['http']['keepalive_expiry'])
+HTTP_PER_HOST_LIMIT = int(config['http']['per_host_limit'])
+
+# 內容擷取設置
+CONTENT_FETCH_MAX_WORKERS = int(config['content_fetching']['max_workers'])
+CONTENT_FETCH_MAX_ATTEMPTS = int(config['content_fetching']['max_attempts'])
+CONTENT_FETCH_TIMEOUT = float(config['content_fetching']['timeout'])
+ARTICLE_EXTRACTION_ENABLED = str(config['content_fetching']['local_extraction']).lower() == 'true'
+ARTICLE_EXTRACTION_MIN_LENGTH = int(config['content_fetching']['local_extraction_min_length'])
+ARTICLE_EXTRACTION_TIMEOUT = float(config['content_fetching']['local_extraction_timeout'])
+# 本地擷取會直接下載真實的文章網頁，替身模式下一律改用 Jina 替身
+if API_PROFILE == 'standin':
+    ARTICLE_EXTRACTION_ENABLED = False
+
+# 擷取管線設置
+INGEST_SUMMARIZE_WORKERS = int(config['ingest_pipeline']['summarize_workers'])
+INGEST_QUEUE_SIZE = int(config['ingest_pipeline']['queue_size'])
+
+# 重複新聞分群設置
+NEWS_CLUSTERING_ENABLED = str(config['news_clustering']['enabled']).lower() == 'true'
+NEWS_CLUSTERING_THRESHOLD = float(config['news_clustering']['threshold'])
+NEWS_CLUSTERING_WINDOW_HOURS = int(config['news_clustering']['window_hours'])
+NEWS_CLUSTERING_FETCH_DUPLICATES = str(config['news_clustering']['fetch_duplicates']).lower() == 'true'
+
+# Instagram 貼文生成設置
+POST_GENERATION_MAX_WORKERS = int(config['post_generation']['max_workers'])
+POST_GENERATION_DEADLINE = float(config['post_generation']['deadline'])
+
+# 候選池設置
+CANDIDATE_POOL_WINDOW_HOURS = int(config['candidate_pool']['window_hours'])
+
+# 選擇新聞前的本地排序設置
+NEWS_RANKING_ENABLED = str(config['news_ranking']['enabled']).lower() == 'true'
+NEWS_RANKING_SHORTLIST_SIZE = int(config['news_ranking']['shortlist_size'])
+NEWS_RANKING_AUDIT_RATE = float(config['news_ranking']['audit_rate'])
+NEWS_RANKING_WEIGHTS = {name: float(weight) for name, weight in config['news_ranking']['weights'].items()}
+NEWS_RANKING_KEYWORDS = {keyword.lower(): float(weight) for keyword, weight in (config['news_ranking']['keywords'] or {}).items()}
+NEWS_RANKING_SOURCE_WEIGHTS = {name: float(weight) for name, weight in (config['news_ranking']['source_weights'] or {}).items()}
+
+# 分組選擇新聞設置
+NEWS_SELECTION_CHUNK_SIZE = int(config['news_selection']['chunk_size'])
+NEWS_SELECTION_WINNERS_PER_CHUNK = int(config['news_selection']['winners_per_chunk'])
+NEWS_SELECTION_MAX_WORKERS = int(config['news_selection']['max_workers'])
+
+# 已發布貼文相似度過濾設置
+PUBLISHED_FILTER_WINDOW_HOURS = int(config['published_filter']['window_hours'])
+PUBLISHED_FILTER_THRESHOLD = float(config['published_filter']['threshold'])
+PUBLISHED_FILTER_REVIEW_THRESHOLD = float(config['published_filter']['review_threshold'])
+
+# 文章擷取快取設置
+FETCH_CACHE_ENABLED = str(config['fetch_cache']['enabled']).lower() == 'true'
+FETCH_CACHE_PATH = config['fetch_cache']['path']
+FETCH_CACHE_MAX_SIZE_MB = int(config['fetch_cache']['max_size_mb'])
+FETCH_CACHE_TTL = int(config['fetch_cache']['ttl'])
+
+# LLM 輸入內容壓縮設置
+LLM_CONTEXT_TOKEN_BUDGET = int(config['llm_context']['token_budget'])
+LLM_CONTEXT_TOKENIZER = config['llm_context']['tokenizer']
+
+# 批次摘要設置
+BATCH_SUMMARY_MODEL = config['batch_summary']['model']
+BATCH_SUMMARY_MAX_REQUESTS = int(config['batch_summary']['max_requests'])
+BATCH_SUMMARY_COMPLETION_WINDOW = config['batch_summary']['completion_window']
+
+# 各上游服務的速率限制
+RATE_LIMITS = {
+    name: {
+        'calls': int(limit['calls']),
+        'period': float(limit['period']),
+        'burst': int(limit['burst']),
+    }
+    for name, limit in config['rate_limits'].items()
+}
+
+# RSS Feed 輪詢設置
+FEED_POLL_MAX_WORKERS = int(config['feed_polling']['max_workers'])
+FEED_POLL_TIMEOUT = float(config['feed_polling']['timeout'])
+FEED_POLL_MIN_INTERVAL = int(config['feed_polling']['min_interval'])
+FEED_POLL_MAX_INTERVAL = int(config['feed_polling']['max_interval'])
+FEED_POLL_GRACE_PERIOD = int(config['feed_polling']['grace_period'])
+FEED_POLL_HISTORY_SIZE = int(config['feed_polling']['history_size'])
+
+# 常駐模式設置
+DAEMON_INGEST_INTERVAL = int(config['daemon']['ingest_interval'])
+DAEMON_POST_INTERVAL = int(config['daemon']['post_interval'])
+DAEMON_NUM_CHOSEN = int(config['daemon']['num_chosen'])
 
 # RSS 配置
 RSS_CONFIG = rss_config
@@ -61,4 +187,6 @@ RSS_CONFIG = rss_config
 # 顯示當前使用的環境
 print(f"Current environment: {ENV}")
 print(f"Using DATABASE_URL: {DATABASE_URL}")
-print(f"Using JINA_API_URL: {JINA_API_URL}")
\ No newline at end of file
+print(f"Using JINA_API_URL: {JINA_API_URL}")
+if API_PROFILE != 'live' or HTTP_CASSETTE_MODE != 'off':
+    logging.getLogger(__name__).warning(f"未使用真實 API：API_PROFILE={API_PROFILE}，HTTP_CASSETTE_MODE={HTTP_CASSETTE_MODE}")
\ No newline at end of file
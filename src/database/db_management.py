@@ -1,9 +1,14 @@
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
-from src.database.models import Base
-from src.config.settings import DATABASE_URL
+from src.database.models import Base, File, News
+from src.database.operations import compute_content_hash, rebuild_candidate_pool
+from src.utils.compression import compress, decompress, IDENTITY
+from src.config.settings import DATABASE_URL, CANDIDATE_POOL_WINDOW_HOURS, NEWS_CLUSTERING_WINDOW_HOURS
+from src.services.news_clusterer import NewsClusterer
 import argparse
 import logging
+import time
+from datetime import datetime, timedelta, timezone
 
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine)
@@ -17,6 +22,138 @@ def create_tables():
     Base.metadata.create_all(engine)
     logging.info("數據庫已創建")
 
+# 既有資料庫的結構變更，皆需可重複執行
+MIGRATIONS = [
+    "ALTER TABLE feeds ADD COLUMN IF NOT EXISTS etag VARCHAR",
+    "ALTER TABLE feeds ADD COLUMN IF NOT EXISTS last_modified VARCHAR",
+    "ALTER TABLE feeds ADD COLUMN IF NOT EXISTS poll_interval INTEGER",
+    "ALTER TABLE feeds ADD COLUMN IF NOT EXISTS next_poll_at TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE files ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS files_content_hash_key ON files (content_hash)",
+    "ALTER TABLE files ADD COLUMN IF NOT EXISTS encoding VARCHAR(20) NOT NULL DEFAULT 'identity'",
+    "ALTER TABLE news ADD COLUMN IF NOT EXISTS context TEXT",
+    "ALTER TABLE news ADD COLUMN IF NOT EXISTS context_key VARCHAR(100)",
+    "ALTER TABLE news ADD COLUMN IF NOT EXISTS summary_input_hash VARCHAR(64)",
+    "ALTER TABLE news ADD COLUMN IF NOT EXISTS summary_prompt_version VARCHAR(16)",
+    "ALTER TABLE news ADD COLUMN IF NOT EXISTS summary_model VARCHAR(100)",
+    "ALTER TABLE summary_batches ADD COLUMN IF NOT EXISTS prompt_version VARCHAR(16)",
+    "ALTER TABLE summary_batches ADD COLUMN IF NOT EXISTS input_hashes VARCHAR(64)[]",
+    "ALTER TABLE news ADD COLUMN IF NOT EXISTS simhash BIGINT",
+    "ALTER TABLE news ADD COLUMN IF NOT EXISTS cluster_id INTEGER",
+    "CREATE INDEX IF NOT EXISTS ix_news_cluster_id ON news (cluster_id)",
+    "ALTER TABLE chosen_news ADD COLUMN IF NOT EXISTS candidate_count INTEGER",
+    "ALTER TABLE chosen_news ADD COLUMN IF NOT EXISTS shortlist_ids INTEGER[]",
+    "ALTER TABLE chosen_news ADD COLUMN IF NOT EXISTS audit_news_ids INTEGER[]",
+    # SimHash 無法分辨改寫的同一則新聞，改以 MinHash 簽章分群
+    "ALTER TABLE news ADD COLUMN IF NOT EXISTS minhash BIGINT[]",
+    "ALTER TABLE news DROP COLUMN IF EXISTS simhash",
+    # 已發布貼文的英文與中日韓文字分開比對，升級後需執行 published_index rebuild
+    "ALTER TABLE published_sketches ADD COLUMN IF NOT EXISTS cjk_signature BIGINT[] NOT NULL DEFAULT '{}'",
+    "ALTER TABLE published_sketches DROP COLUMN IF EXISTS shingle_count",
+]
+
+def migrate_db():
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for statement in MIGRATIONS:
+            conn.execute(text(statement))
+    logging.info("數據庫結構已更新")
+
+def dedupe_files(batch_size=500):
+    # 為既有的 Markdown 文件補上內容雜湊，重複的內容合併為同一筆
+    merged = 0
+    hashed = 0
+    last_id = 0
+    with SessionLocal() as db:
+        while True:
+            rows = (
+                db.query(File.id, File.data, File.encoding)
+                .filter(File.content_hash.is_(None), File.content_type == 'text/markdown', File.id > last_id)
+                .order_by(File.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            for file_id, data, encoding in rows:
+                last_id = file_id
+                content_hash = compute_content_hash(decompress(data, encoding) or b'')
+                keeper_id = db.query(File.id).filter(File.content_hash == content_hash).scalar()
+                if keeper_id:
+                    db.query(News).filter(News.md_file_id == file_id).update({'md_file_id': keeper_id})
+                    db.query(File).filter(File.id == file_id).delete()
+                    merged += 1
+                else:
+                    db.query(File).filter(File.id == file_id).update({'content_hash': content_hash})
+                    hashed += 1
+            db.commit()
+    logging.info(f"已為 {hashed} 個文件建立內容雜湊，合併 {merged} 個重複文件")
+
+def compress_files(batch_size=200, pause=0.5):
+    # 分批壓縮既有的文字文件，每批之間暫停以降低對線上服務的影響
+    compressed = 0
+    saved_bytes = 0
+    last_id = 0
+    with SessionLocal() as db:
+        while True:
+            rows = (
+                db.query(File)
+                .filter(File.encoding == IDENTITY, File.content_type.like('text/%'), File.id > last_id)
+                .order_by(File.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            for file in rows:
+                last_id = file.id
+                if file.data is None:
+                    continue
+                original = bytes(file.data)
+                stored_data, encoding = compress(original, file.content_type)
+                if encoding != IDENTITY:
+                    file.data = stored_data
+                    file.encoding = encoding
+                    compressed += 1
+                    saved_bytes += len(original) - len(stored_data)
+            db.commit()
+            db.expunge_all()
+            logging.info(f"已壓縮 {compressed} 個文件，節省 {saved_bytes / 1024 / 1024:.1f} MB")
+            time.sleep(pause)
+    logging.info(f"壓縮完成：共壓縮 {compressed} 個文件，節省 {saved_bytes / 1024 / 1024:.1f} MB")
+
+def rebuild_pool(hours=CANDIDATE_POOL_WINDOW_HOURS):
+    # 候選池平時增量更新，升級後或資料不一致時從 news 重新建立
+    with SessionLocal() as db:
+        count = rebuild_candidate_pool(db, datetime.now(timezone.utc) - timedelta(hours=hours))
+    logging.info(f"候選池已重建，共 {count} 條新聞")
+
+def backfill_minhash(hours=NEWS_CLUSTERING_WINDOW_HOURS, batch_size=500):
+    # 為分群時間範圍內尚無簽章的新聞補上 MinHash，升級後既有的新聞才能作為群組代表
+    updated = 0
+    last_id = 0
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    with SessionLocal() as db:
+        while True:
+            rows = (
+                db.query(News.id, News.title, News.summary)
+                .filter(News.minhash.is_(None), News.published_at >= since, News.id > last_id)
+                .order_by(News.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            for news_id, title, summary in rows:
+                last_id = news_id
+                db.query(News).filter(News.id == news_id).update({'minhash': NewsClusterer.fingerprint(title or '', summary)})
+                updated += 1
+            db.commit()
+    logging.info(f"已為 {updated} 條新聞建立 MinHash 簽章")
+
 def truncate_tables():
     with SessionLocal() as db:
         tables = ['news', 'feeds', 'media', 'files']
@@ -27,7 +164,9 @@ def truncate_tables():
 
 def main():
     parser = argparse.ArgumentParser(description="數據庫管理工具")
-    parser.add_argument('action', choices=['init', 'truncate', 'create'], help="選擇操作：init（初始化數據庫）或 truncate（清空表格）或 create（創建表格）")
+    parser.add_argument('action', choices=['init', 'truncate', 'create', 'migrate', 'dedupe-files', 'compress-files', 'rebuild-candidate-pool', 'backfill-minhash'], help="選擇操作：init（初始化數據庫）或 truncate（清空表格）或 create（創建表格）或 migrate（更新既有表格結構）或 dedupe-files（合併重複的 Markdown 文件）或 compress-files（壓縮既有的文字文件）或 rebuild-candidate-pool（重建選擇新聞用的候選池）或 backfill-minhash（為近期新聞補建分群用的簽章）")
+    parser.add_argument('--batch-size', type=int, default=200, help="compress-files 每批處理的文件數")
+    parser.add_argument('--hours', type=int, default=None, help="rebuild-candidate-pool 與 backfill-minhash 納入的時間範圍（小時），預設分別為候選池與分群的時間範圍")
     
     args = parser.parse_args()
     
@@ -37,6 +176,16 @@ def main():
         truncate_tables()
     elif args.action == 'create':
         create_tables()
+    elif args.action == 'migrate':
+        migrate_db()
+    elif args.action == 'dedupe-files':
+        dedupe_files()
+    elif args.action == 'compress-files':
+        compress_files(batch_size=args.batch_size)
+    elif args.action == 'rebuild-candidate-pool':
+        rebuild_pool(args.hours or CANDIDATE_POOL_WINDOW_HOURS)
+    elif args.action == 'backfill-minhash':
+        backfill_minhash(args.hours or NEWS_CLUSTERING_WINDOW_HOURS)
     logging.info(f"{args.action} 操作完成")
 
 if __name__ == "__main__":
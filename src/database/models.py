@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, LargeBinary, ARRAY, Text
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, LargeBinary, ARRAY, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from src.utils.compression import decompress
 
 Base = declarative_base()
 
@@ -23,6 +24,10 @@ class Feed(Base):
     name = Column(String(255), nullable=False)
     media_id = Column(Integer, ForeignKey('media.id'))
     last_fetched = Column(DateTime(timezone=True))
+    etag = Column(String)
+    last_modified = Column(String)
+    poll_interval = Column(Integer)
+    next_poll_at = Column(DateTime(timezone=True))
 
     media = relationship("Media", back_populates="feeds")
     news = relationship("News", back_populates="feed")
@@ -34,8 +39,17 @@ class File(Base):
     filename = Column(String(255), nullable=False)
     content_type = Column(String(100), nullable=False)
     data = Column(LargeBinary)
+    # data 的壓縮方式：identity（未壓縮）、zlib 或 zstd
+    encoding = Column(String(20), nullable=False, default='identity', server_default='identity')
+    # 未壓縮內容的 SHA-256，相同內容只保存一份
+    content_hash = Column(String(64), unique=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    @property
+    def content(self) -> bytes:
+        # 讀取時自動解壓縮
+        return decompress(self.data, self.encoding)
+
 class News(Base):
     __tablename__ = 'news'
 
@@ -51,6 +65,18 @@ class News(Base):
     feed_id = Column(Integer, ForeignKey('feeds.id'))
     md_file_id = Column(Integer, ForeignKey('files.id'))
     png_file_id = Column(Integer, ForeignKey('files.id'))
+    # 去除雜訊並裁切至 token 預算的正文，供摘要、貼文與圖片提示共用
+    context = Column(Text)
+    # 產生 context 時的壓縮設定與 Markdown 內容雜湊，不一致時需重新產生
+    context_key = Column(String(100))
+    # 產生摘要時的輸入雜湊、提示版本與模型，三者皆未變更時重新摘要可略過
+    summary_input_hash = Column(String(64))
+    summary_prompt_version = Column(String(16))
+    summary_model = Column(String(100))
+    # 標題與 RSS 摘要的 bottom-k MinHash 簽章，用於找出其他媒體報導的同一則新聞
+    minhash = Column(ARRAY(BigInteger))
+    # 重複新聞所屬群組的代表新聞 ID，代表本身為 NULL；代表被清除後仍保留，因此不設外鍵
+    cluster_id = Column(Integer, index=True)
 
     feed = relationship("Feed", back_populates="news")
     media = relationship("Media", back_populates="news")
@@ -67,6 +93,11 @@ class ChosenNews(Base):
     id = Column(Integer, primary_key=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     news_ids = Column(ARRAY(Integer))
+    # 本地排序前的候選數與送入 LLM 的候選清單（依名次排列），未啟用排序時為 NULL
+    candidate_count = Column(Integer)
+    shortlist_ids = Column(ARRAY(Integer))
+    # 抽查時 LLM 從全部候選中選出的新聞，用來統計候選清單的涵蓋率
+    audit_news_ids = Column(ARRAY(Integer))
 
     instagram_posts = relationship("InstagramPost", back_populates="chosen_news")
 
@@ -100,6 +131,51 @@ class Published(Base):
 
     story = relationship("Story", back_populates="published", uselist=False)
 
+class CandidatePool(Base):
+    __tablename__ = 'candidate_pool'
+
+    # 尚未發布的群組代表新聞，擷取、摘要與發布時增量更新，選擇新聞時直接讀取
+    news_id = Column(Integer, ForeignKey('news.id', ondelete='CASCADE'), primary_key=True)
+    title = Column(String, nullable=False)
+    summary = Column(String)
+    ai_title = Column(String)
+    ai_summary = Column(String)
+    published_at = Column(DateTime(timezone=True), index=True)
+    media = Column(String(255))
+    # 其他媒體報導同一則新聞的篇數
+    duplicates = Column(Integer, nullable=False, default=0, server_default='0')
+
+class PublishedSketch(Base):
+    __tablename__ = 'published_sketches'
+
+    id = Column(Integer, primary_key=True)
+    # data_cleaner 清除舊貼文與新聞時一併刪除簽章
+    instagram_post_id = Column(Integer, ForeignKey('instagram_posts.id', ondelete='CASCADE'), nullable=False, unique=True)
+    news_id = Column(Integer, ForeignKey('news.id', ondelete='CASCADE'), nullable=False)
+    # 貼文標題、說明與原始新聞標題、摘要的 bottom-k MinHash 簽章，英文與中日韓文字分開
+    signature = Column(ARRAY(BigInteger), nullable=False)
+    cjk_signature = Column(ARRAY(BigInteger), nullable=False, server_default='{}')
+    published_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class SummaryBatch(Base):
+    __tablename__ = 'summary_batches'
+
+    id = Column(Integer, primary_key=True)
+    # 批次任務 API 回傳的識別碼與檔案 ID
+    batch_id = Column(String, nullable=False, unique=True)
+    input_file_id = Column(String, nullable=False)
+    output_file_id = Column(String)
+    error_file_id = Column(String)
+    status = Column(String(32), nullable=False)
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(String(16))
+    news_ids = Column(ARRAY(Integer), nullable=False)
+    # 與 news_ids 對應的摘要輸入雜湊
+    input_hashes = Column(ARRAY(String(64)))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # 結果已寫回 news 或任務已失敗，不再追蹤
+    ingested_at = Column(DateTime(timezone=True))
+
 class Story(Base):
     __tablename__ = 'stories'
 
@@ -1,9 +1,12 @@
 from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.orm import Session
-from .models import Media, Feed, News, File, InstagramPost
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+from .models import Media, Feed, News, File, ChosenNews, InstagramPost, Published, PublishedSketch, SummaryBatch, CandidatePool
 import hashlib
 import logging
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql import func
+from src.utils.compression import compress
 
 def upsert_media(db: Session, name: str, url: str) -> int:
     stmt = insert(Media).values(name=name, url=url)
@@ -25,17 +28,108 @@ def upsert_feed(db: Session, url: str, media_id: int, name: str) -> int:
     db.commit()
     return result.inserted_primary_key[0]
 
+def get_feed_fetch_states(db: Session, feed_ids: list) -> dict:
+    rows = (
+        db.query(Feed.id, Feed.etag, Feed.last_modified, Feed.poll_interval, Feed.next_poll_at)
+        .filter(Feed.id.in_(feed_ids))
+        .all()
+    )
+    return {
+        row.id: {
+            'etag': row.etag,
+            'last_modified': row.last_modified,
+            'poll_interval': row.poll_interval,
+            'next_poll_at': row.next_poll_at
+        }
+        for row in rows
+    }
+
+def update_feed_fetch_state(db: Session, feed_id: int, etag: str = None, last_modified: str = None) -> None:
+    db.query(Feed).filter(Feed.id == feed_id).update({
+        'etag': etag,
+        'last_modified': last_modified,
+        'last_fetched': func.now()
+    })
+    db.commit()
+
+def get_recent_publish_times(db: Session, feed_ids: list, limit: int) -> dict:
+    # 以視窗函數一次取得每個 Feed 最近 limit 則新聞的發布時間
+    row_number = func.row_number().over(
+        partition_by=News.feed_id,
+        order_by=News.published_at.desc()
+    ).label('row_number')
+    recent = (
+        db.query(News.feed_id, News.published_at, row_number)
+        .filter(News.feed_id.in_(feed_ids), News.published_at.isnot(None))
+        .subquery()
+    )
+    rows = (
+        db.query(recent.c.feed_id, recent.c.published_at)
+        .filter(recent.c.row_number <= limit)
+        .order_by(recent.c.feed_id, recent.c.published_at.desc())
+        .all()
+    )
+    publish_times = {feed_id: [] for feed_id in feed_ids}
+    for row in rows:
+        publish_times[row.feed_id].append(row.published_at)
+    return publish_times
+
+def update_feed_schedules(db: Session, schedules: dict) -> None:
+    for feed_id, (poll_interval, next_poll_at) in schedules.items():
+        db.query(Feed).filter(Feed.id == feed_id).update({
+            'poll_interval': poll_interval,
+            'next_poll_at': next_poll_at
+        })
+    db.commit()
+
+def get_existing_news_links(db: Session, links: list) -> set:
+    # 一次查詢整個 Feed 的連結，只取 link 欄位
+    if not links:
+        return set()
+    rows = db.query(News.link).filter(News.link.in_(set(links))).all()
+    return {row.link for row in rows}
+
+def compute_content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def get_or_create_file(db: Session, filename: str, content_type: str, data: bytes) -> int:
+    # 以內容雜湊去重，相同內容直接沿用既有的文件
+    content_hash = compute_content_hash(data)
+    stored_data, encoding = compress(data, content_type)
+    stmt = insert(File).values(
+        filename=filename,
+        content_type=content_type,
+        data=stored_data,
+        encoding=encoding,
+        content_hash=content_hash
+    )
+    stmt = stmt.on_conflict_do_nothing(index_elements=['content_hash']).returning(File.id)
+    file_id = db.execute(stmt).scalar()
+    if file_id is None:
+        file_id = db.query(File.id).filter(File.content_hash == content_hash).scalar()
+    return file_id
+
+def delete_file_if_orphaned(db: Session, file_id: int) -> None:
+    # 內容已更新時，移除不再被任何新聞引用的舊文件
+    if file_id is None:
+        return
+    referenced = db.query(News.id).filter(
+        (News.md_file_id == file_id) | (News.png_file_id == file_id)
+    ).first()
+    if not referenced:
+        db.query(File).filter(File.id == file_id).delete()
+
 def upsert_news_with_content(db: Session, news_data: dict, md_content: str) -> int:
     try:
         url_hash = hashlib.md5(news_data['link'].encode()).hexdigest()
-        
-        md_file = File(
+        previous_md_file_id = db.query(News.md_file_id).filter(News.link == news_data['link']).scalar()
+
+        md_file_id = get_or_create_file(
+            db,
             filename=f"{url_hash}.md",
             content_type="text/markdown",
             data=md_content.encode('utf-8')
         )
-        db.add(md_file)
-        db.flush()
 
         news_values = {
             'link': news_data['link'],
@@ -46,7 +140,8 @@ def upsert_news_with_content(db: Session, news_data: dict, md_content: str) -> i
             'published_at': news_data['published_at'],
             'media_id': news_data['media_id'],
             'feed_id': news_data['feed_id'],
-            'md_file_id': md_file.id
+            'md_file_id': md_file_id,
+            'minhash': news_data.get('minhash')
         }
 
         stmt = insert(News).values(**news_values)
@@ -55,23 +150,210 @@ def upsert_news_with_content(db: Session, news_data: dict, md_content: str) -> i
             set_={
                 'title': stmt.excluded.title,
                 'summary': stmt.excluded.summary,
-                'ai_title': stmt.excluded.ai_title,
-                'ai_summary': stmt.excluded.ai_summary,
+                # 重新爬取時沒有提供摘要，保留既有的摘要
+                'ai_title': func.coalesce(stmt.excluded.ai_title, News.ai_title),
+                'ai_summary': func.coalesce(stmt.excluded.ai_summary, News.ai_summary),
                 'published_at': stmt.excluded.published_at,
                 'media_id': stmt.excluded.media_id,
                 'feed_id': stmt.excluded.feed_id,
-                'md_file_id': stmt.excluded.md_file_id
+                'md_file_id': stmt.excluded.md_file_id,
+                'minhash': func.coalesce(stmt.excluded.minhash, News.minhash)
             }
         )
         
         result = db.execute(stmt)
+        if previous_md_file_id != md_file_id:
+            delete_file_if_orphaned(db, previous_md_file_id)
         db.commit()
-        return result.inserted_primary_key[0]
+        news_id = result.inserted_primary_key[0]
+        refresh_candidate_pool(db, [news_id])
+        return news_id
     except SQLAlchemyError as e:
         db.rollback()
         logging.error(f"數據庫操作錯誤：{str(e)}")
         raise
 
+def insert_duplicate_news(db: Session, news_data: dict, cluster_id: int) -> int:
+    # 重複的新聞只保存 RSS 資訊，不擷取內容也不摘要
+    stmt = insert(News).values(
+        link=news_data['link'],
+        title=news_data['title'],
+        summary=news_data['summary'],
+        published_at=news_data['published_at'],
+        media_id=news_data['media_id'],
+        feed_id=news_data['feed_id'],
+        minhash=news_data.get('minhash'),
+        cluster_id=cluster_id
+    ).on_conflict_do_nothing(index_elements=['link']).returning(News.id)
+    news_id = db.execute(stmt).scalar()
+    db.commit()
+    # 代表的重複報導數改變
+    refresh_candidate_pool(db, [cluster_id])
+    return news_id
+
+def get_cluster_representatives(db: Session, since) -> list:
+    # 可作為群組代表的近期新聞，只取連結與 MinHash 簽章
+    return (
+        db.query(News.link, News.minhash)
+        .filter(News.published_at >= since, News.minhash.isnot(None), News.cluster_id.is_(None))
+        .all()
+    )
+
+def get_news_ids_by_links(db: Session, links: list) -> dict:
+    if not links:
+        return {}
+    return {row.link: row.id for row in db.query(News.link, News.id).filter(News.link.in_(set(links))).all()}
+
+def update_news_clusters(db: Session, clusters: dict) -> None:
+    """clusters: {news_id: cluster_id}"""
+    for news_id, cluster_id in clusters.items():
+        db.query(News).filter(News.id == news_id).update({'cluster_id': cluster_id})
+    db.commit()
+    refresh_candidate_pool(db, list(clusters) + list(clusters.values()))
+
+CANDIDATE_COLUMNS = ['news_id', 'title', 'summary', 'ai_title', 'ai_summary', 'published_at', 'media', 'duplicates']
+
+def _candidate_rows():
+    # 未發布的群組代表新聞與其媒體名稱、重複報導數，欄位順序同 CANDIDATE_COLUMNS
+    published = select(Published.id).where(Published.news_id == News.id).exists()
+    duplicate = aliased(News)
+    duplicates = (
+        select(func.count(duplicate.id)).where(duplicate.cluster_id == News.id)
+        .correlate(News).scalar_subquery()
+    )
+    return (
+        select(News.id, News.title, News.summary, News.ai_title, News.ai_summary, News.published_at,
+               Media.name, duplicates)
+        .outerjoin(Media, News.media_id == Media.id)
+        .where(News.cluster_id.is_(None), ~published)
+    )
+
+def refresh_candidate_pool(db: Session, news_ids: list) -> None:
+    """重新計算指定新聞在候選池中的資料；已發布或成為重複報導的新聞會被移除"""
+    news_ids = [news_id for news_id in set(news_ids) if news_id is not None]
+    if not news_ids:
+        return
+    db.query(CandidatePool).filter(CandidatePool.news_id.in_(news_ids)).delete(synchronize_session=False)
+    db.execute(insert(CandidatePool).from_select(CANDIDATE_COLUMNS, _candidate_rows().where(News.id.in_(news_ids))))
+    db.commit()
+
+def remove_from_candidate_pool(db: Session, news_ids: list) -> None:
+    db.query(CandidatePool).filter(CandidatePool.news_id.in_(news_ids)).delete(synchronize_session=False)
+    db.commit()
+
+def expire_candidate_pool(db: Session, before) -> int:
+    # 發布時間早於選擇範圍的新聞不會再被選到
+    expired = db.query(CandidatePool).filter(CandidatePool.published_at < before).delete(synchronize_session=False)
+    db.commit()
+    return expired
+
+def rebuild_candidate_pool(db: Session, since) -> int:
+    """清空候選池並從 news 重新建立 since 之後發布的新聞，回傳加入的篇數"""
+    db.query(CandidatePool).delete(synchronize_session=False)
+    db.execute(insert(CandidatePool).from_select(CANDIDATE_COLUMNS, _candidate_rows().where(News.published_at >= since)))
+    db.commit()
+    return db.query(func.count(CandidatePool.news_id)).scalar()
+
+def iter_candidate_news(db: Session, since, until, batch_size: int = 500):
+    """逐筆產生候選池中時間範圍內的新聞，只包含選擇與排序新聞所需的欄位"""
+    rows = (
+        db.query(*(getattr(CandidatePool, column) for column in CANDIDATE_COLUMNS))
+        .filter(CandidatePool.published_at.between(since, until))
+        .order_by(CandidatePool.published_at.desc())
+        .execution_options(yield_per=batch_size)
+    )
+    for row in rows:
+        yield {
+            'id': row.news_id,
+            'title': row.title,
+            'summary': row.summary,
+            'ai_title': row.ai_title,
+            'ai_summary': row.ai_summary,
+            'published_at': row.published_at,
+            'media': row.media,
+            'duplicates': row.duplicates,
+        }
+
+def get_ranked_chosen_news(db: Session, since) -> list:
+    # 有記錄本地排序結果的選擇紀錄
+    return (
+        db.query(ChosenNews.news_ids, ChosenNews.candidate_count, ChosenNews.shortlist_ids, ChosenNews.audit_news_ids)
+        .filter(ChosenNews.timestamp >= since, ChosenNews.shortlist_ids.isnot(None))
+        .order_by(ChosenNews.timestamp)
+        .all()
+    )
+
+def upsert_published_sketch(db: Session, instagram_post_id: int, news_id: int, signature: list,
+                            cjk_signature: list, published_at=None) -> None:
+    values = dict(instagram_post_id=instagram_post_id, news_id=news_id, signature=signature, cjk_signature=cjk_signature)
+    if published_at is not None:
+        values['published_at'] = published_at
+    stmt = insert(PublishedSketch).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['instagram_post_id'],
+        set_=dict(signature=stmt.excluded.signature, cjk_signature=stmt.excluded.cjk_signature)
+    )
+    db.execute(stmt)
+    db.commit()
+
+def get_recent_published_sketches(db: Session, since) -> list:
+    return (
+        db.query(PublishedSketch.instagram_post_id, PublishedSketch.news_id,
+                 PublishedSketch.signature, PublishedSketch.cjk_signature)
+        .filter(PublishedSketch.published_at >= since)
+        .all()
+    )
+
+def update_news_context(db: Session, news_id: int, context: str, context_key: str) -> None:
+    db.query(News).filter(News.id == news_id).update({'context': context, 'context_key': context_key})
+    db.commit()
+
+def get_pending_summary_news(db: Session, limit: int) -> list:
+    # 尚未摘要、且不在進行中批次任務內的新聞
+    in_open_batches = db.query(func.unnest(SummaryBatch.news_ids)).filter(SummaryBatch.ingested_at.is_(None))
+    return (
+        db.query(News)
+        .filter(News.ai_summary.is_(None), News.md_file_id.isnot(None), News.id.not_in(in_open_batches))
+        .order_by(News.published_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+def create_summary_batch(db: Session, batch_id: str, input_file_id: str, status: str, model: str, news_ids: list,
+                         prompt_version: str = None, input_hashes: list = None) -> int:
+    batch = SummaryBatch(batch_id=batch_id, input_file_id=input_file_id, status=status, model=model, news_ids=news_ids,
+                         prompt_version=prompt_version, input_hashes=input_hashes)
+    db.add(batch)
+    db.commit()
+    return batch.id
+
+def get_open_summary_batches(db: Session) -> list:
+    return db.query(SummaryBatch).filter(SummaryBatch.ingested_at.is_(None)).order_by(SummaryBatch.id).all()
+
+def get_news_summary_states(db: Session, links: list) -> dict:
+    if not links:
+        return {}
+    rows = db.query(
+        News.link, News.id, News.ai_summary, News.summary_input_hash, News.summary_prompt_version, News.summary_model
+    ).filter(News.link.in_(links)).all()
+    return {
+        row.link: {
+            'id': row.id,
+            'ai_summary': row.ai_summary,
+            'summary_input_hash': row.summary_input_hash,
+            'summary_prompt_version': row.summary_prompt_version,
+            'summary_model': row.summary_model,
+        }
+        for row in rows
+    }
+
+def update_news_summaries(db: Session, summaries: dict) -> None:
+    """summaries: {news_id: {ai_title, ai_summary, summary_input_hash, summary_prompt_version, summary_model}}"""
+    for news_id, values in summaries.items():
+        db.query(News).filter(News.id == news_id).update(values)
+    db.commit()
+    refresh_candidate_pool(db, list(summaries))
+
 def upsert_news_with_png(db: Session, news_id: int, png_content: bytes) -> int:
     try:
         news = db.query(News).filter(News.id == news_id).first()
@@ -80,10 +362,12 @@ def upsert_news_with_png(db: Session, news_id: int, png_content: bytes) -> int:
 
         url_hash = hashlib.md5(news.link.encode()).hexdigest()
         
+        stored_data, encoding = compress(png_content, "image/png")
         png_file = File(
             filename=f"{url_hash}.png",
             content_type="image/png",
-            data=png_content
+            data=stored_data,
+            encoding=encoding
         )
         db.add(png_file)
         db.flush()
@@ -98,21 +382,32 @@ def upsert_news_with_png(db: Session, news_id: int, png_content: bytes) -> int:
         raise
 
 def upsert_file(db: Session, filename: str, content_type: str, data: bytes) -> int:
+    stored_data, encoding = compress(data, content_type)
     file = db.query(File).filter(File.filename == filename).first()
     if file:
         file.content_type = content_type
-        file.data = data
+        file.data = stored_data
+        file.encoding = encoding
+        file.content_hash = None
     else:
         file = File(
             filename=filename,
             content_type=content_type,
-            data=data
+            data=stored_data,
+            encoding=encoding
         )
         db.add(file)
     db.commit()
     db.refresh(file)
     return file.id
 
+def insert_instagram_posts(db: Session, posts: list) -> None:
+    """posts: [{news_id, chosen_news_id, ig_title, ig_caption}]，以單一批次寫入"""
+    if not posts:
+        return
+    db.execute(insert(InstagramPost), posts)
+    db.commit()
+
 def upsert_ig_post_with_png(db: Session, post_id: int, png_content: bytes) -> int:
     try:
         ig_post = db.query(InstagramPost).filter(InstagramPost.id == post_id).first()
@@ -122,10 +417,12 @@ def upsert_ig_post_with_png(db: Session, post_id: int, png_content: bytes) -> in
         # 使用貼文 ID 和新聞 ID 來生成唯一的文件名
         filename = f"integrated_{ig_post.news_id}_{post_id}.png"
         
+        stored_data, encoding = compress(png_content, "image/png")
         png_file = File(
             filename=filename,
             content_type="image/png",
-            data=png_content
+            data=stored_data,
+            encoding=encoding
         )
         db.add(png_file)
         db.flush()
@@ -26,7 +26,7 @@ def news_image(news_id):
         # 將二進制數據寫入文件
         destination = os.path.join("./image", f"{news_id}.png")
         with open(destination, "wb") as f:
-            f.write(file.data)
+            f.write(file.content)
 
         print(f"圖片已成功保存到 {destination}")
 
@@ -57,7 +57,7 @@ def news_content(news_id):
         # 將二進制數據寫入文件
         destination = os.path.join("./news", f"{news_id}.md")
         with open(destination, "wb") as f:
-            f.write(file.data)
+            f.write(file.content)
 
         print(f"Markdown 文件已成功保存到 {destination}")
 
@@ -88,7 +88,7 @@ def get_instagram_post_image(post_id):
         # 將二進制數據寫入文件
         destination = os.path.join("./instagram_images", f"{post_id}.png")
         with open(destination, "wb") as f:
-            f.write(file.data)
+            f.write(file.content)
 
         print(f"Instagram 貼文整合圖片已成功保存到 {destination}")
 
@@ -1,6 +1,9 @@
 import argparse
 import logging
 import os
+import signal
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from dateutil.parser import parse as dateutil_parse
 import pytz
@@ -8,17 +11,24 @@ import pytz
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from src.config.settings import RSS_CONFIG, DATABASE_URL
-from src.database.operations import upsert_media, upsert_feed, upsert_news_with_content
+from src.config.settings import RSS_CONFIG, DATABASE_URL, DAEMON_INGEST_INTERVAL, DAEMON_POST_INTERVAL, DAEMON_NUM_CHOSEN, INGEST_SUMMARIZE_WORKERS, INGEST_QUEUE_SIZE, NEWS_CLUSTERING_ENABLED, NEWS_CLUSTERING_FETCH_DUPLICATES
+from src.database.operations import upsert_media, upsert_feed, upsert_news_with_content, get_feed_fetch_states, update_feed_fetch_state, get_existing_news_links, get_news_summary_states, update_news_summaries, insert_duplicate_news, get_news_ids_by_links, update_news_clusters
 from src.database.models import News, ChosenNews, InstagramPost
 from src.services.feed_parser import FeedParser
+from src.services.feed_poller import FeedPoller
+from src.services.feed_scheduler import FeedScheduler
 from src.services.content_fetcher import ContentFetcher, ContentFetchException
+from src.services.context_compressor import ContextCompressor
+from src.services.news_clusterer import NewsClusterer
 from src.services.news_summarizer import NewsSummarizer
+from src.services.batch_summarizer import BatchSummarizer
 from src.services.news_chooser import NewsChooser
 from src.services.instagram_post_generator import InstagramPostGenerator
 from src.services.image_generator import ImageGenerator
 from src.services.image_integrator import ImageIntegrator
 from src.services.instagram_poster_official import InstagramPoster
+from src.utils.http_client import close_http_client
+from src.utils.pipeline import Pipeline
 
 # 設置日誌記錄
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -48,13 +58,19 @@ class InfoEssence:
     def __init__(self):
         self.engine = create_engine(DATABASE_URL)
         self.SessionLocal = sessionmaker(bind=self.engine)
-        self.content_fetcher = ContentFetcher(self.SessionLocal())
+        self.content_fetcher = ContentFetcher()
         self.feed_parser = FeedParser()
+        self.feed_poller = FeedPoller()
+        self.feed_scheduler = FeedScheduler()
+        self.context_compressor = ContextCompressor()
+        self.news_clusterer = NewsClusterer()
         self.news_summarizer = NewsSummarizer()
+        self.batch_summarizer = BatchSummarizer(engine=self.engine)
         self.image_generator = ImageGenerator()
-        self.instagram_post_generator = InstagramPostGenerator()
-        self.image_integrator = ImageIntegrator()
-        self.instagram_poster = InstagramPoster()
+        # 共用同一個 engine 的連線池
+        self.instagram_post_generator = InstagramPostGenerator(engine=self.engine)
+        self.image_integrator = ImageIntegrator(engine=self.engine)
+        self.instagram_poster = InstagramPoster(engine=self.engine)
 
     def update_media_and_feeds(self):
         logging.info("開始更新 Media 和 Feed 資訊")
@@ -65,48 +81,227 @@ class InfoEssence:
                     upsert_feed(db, url=feed['url'], media_id=media_id, name=feed['name'])
         logging.info("Media 和 Feed 資訊已更新完成")
 
-    def fetch_and_store_news(self, re_crawl=False, re_summarize=False):
+    def _collect_active_feeds(self, db):
+        feeds = []
+        for media_info in RSS_CONFIG.values():
+            if media_info.get('status', '').lower() != 'active':
+                continue
+
+            media_id = upsert_media(db, name=media_info['name'], url=media_info['url'])
+            for feed in media_info['feeds']:
+                feed_id = upsert_feed(db, url=feed['url'], media_id=media_id, name=feed['name'])
+                feeds.append({
+                    'url': feed['url'],
+                    'name': feed['name'],
+                    'media_id': media_id,
+                    'feed_id': feed_id,
+                })
+
+        fetch_states = get_feed_fetch_states(db, [feed['feed_id'] for feed in feeds])
+        for feed in feeds:
+            feed.update(fetch_states.get(feed['feed_id'], {}))
+        return feeds
+
+    def fetch_and_store_news(self, re_crawl=False, re_summarize=False, defer_summary=False,
+                             fetch_duplicates=NEWS_CLUSTERING_FETCH_DUPLICATES):
+        self.ingest_summary_batches()
         with self.SessionLocal() as db:
-            for media_info in RSS_CONFIG.values():
-                if media_info.get('status', '').lower() != 'active':
+            feeds = self._collect_active_feeds(db)
+            # 重新爬取時輪詢所有 Feed 且不帶條件標頭，強制下載完整內容
+            if not re_crawl:
+                feeds = self.feed_scheduler.due_feeds(feeds)
+            # 所有 Feed 並行抓取，耗時取決於最慢的 Feed
+            poll_results = self.feed_poller.poll(feeds, conditional=not re_crawl)
+
+            pending = {}
+            failed_entries = {}
+            for poll_result in poll_results:
+                if poll_result['error']:
                     continue
-                
-                media_id = upsert_media(db, name=media_info['name'], url=media_info['url'])
-                for feed in media_info['feeds']:
-                    feed_id = upsert_feed(db, url=feed['url'], media_id=media_id, name=feed['name'])
-                    entries = self.feed_parser.parse_feed(feed['url'])
-                    for entry in entries:
-                        try:
-                            existing_news = db.query(News).filter(News.link == entry['link']).first()
-                            
-                            if existing_news and not re_crawl:
-                                continue
-                            
-                            news_data = {
-                                'link': entry['link'],
-                                'title': entry['title'],
-                                'summary': entry['summary'],
-                                'published_at': parse_date(entry['published']),
-                                'media_id': media_id,
-                                'feed_id': feed_id,
-                            }
-                            
-                            content = self.content_fetcher.fetch_and_save_content(entry['link'], news_data)
-                            
-                            if re_summarize or not existing_news:
-                                ai_title, ai_summary, _ = self.news_summarizer.summarize_content(entry['title'], content)
-                                db.query(News).filter(News.link == entry['link']).update({
-                                    'ai_title': ai_title,
-                                    'ai_summary': ai_summary
-                                })
-                                db.commit()
-                            
-                        except Exception as e:
-                            logging.error(f"處理新聞時發生錯誤：{str(e)},{entry['link']}")
-                            db.rollback()
+
+                media_id = poll_result['feed']['media_id']
+                feed_id = poll_result['feed']['feed_id']
+                failed_entries[feed_id] = 0
+                if poll_result['not_modified']:
+                    continue
+
+                existing_links = get_existing_news_links(db, [entry['link'] for entry in poll_result['entries']])
+                for entry in poll_result['entries']:
+                    existing_news = entry['link'] in existing_links
+                    # 同一篇新聞可能出現在多個 Feed，只處理一次
+                    if (existing_news and not re_crawl) or entry['link'] in pending:
+                        continue
+
+                    try:
+                        news_data = {
+                            'link': entry['link'],
+                            'title': entry['title'],
+                            'summary': entry['summary'],
+                            'published_at': parse_date(entry['published']),
+                            'media_id': media_id,
+                            'feed_id': feed_id,
+                            'minhash': self.news_clusterer.fingerprint(entry['title'], entry['summary']),
+                        }
+                    except Exception as e:
+                        logging.error(f"處理新聞時發生錯誤：{str(e)},{entry['link']}")
+                        failed_entries[feed_id] += 1
+                        continue
+
+                    pending[entry['link']] = (news_data, existing_news)
+
+            # 其他媒體已報導的同一則新聞預設只保存 RSS 資訊，不擷取內容也不摘要
+            clusters = {}
+            duplicates = {}
+            if NEWS_CLUSTERING_ENABLED:
+                clusters = self.news_clusterer.assign(
+                    db, {link: news_data for link, (news_data, existing) in pending.items() if not existing}
+                )
+                if not fetch_duplicates:
+                    duplicates = {link: pending.pop(link)[0] for link in clusters}
+
+            # 重新摘要時只處理輸入、提示或模型有變更的新聞
+            summary_states = get_news_summary_states(db, [link for link, (_, existing) in pending.items() if existing]) if re_summarize else {}
+
+            def fetch_stage(item):
+                # 擷取速率由 ContentFetcher 的令牌桶控制，壓縮正文不需存取資料庫
+                try:
+                    # 重新爬取時不使用快取，避免 TTL 內取回舊的內容
+                    item['content'] = self.content_fetcher.fetch_content(item['link'], bypass_cache=re_crawl)
+                    item['context'] = self.context_compressor.compress(item['content'])
+                except Exception as e:
+                    logging.error(f"爬取內容失敗：URL：{item['link']} - 錯誤：{e}")
+                    item['error'] = e
+                return item
+
+            def summarize_stage(item):
+                # 延後摘要時保留 ai_summary 為空，交由 batch_summarizer 以批次任務處理
+                if item['error'] or defer_summary:
+                    return item
+                title = item['news_data']['title']
+                if not item['existing_news'] or (re_summarize and self.news_summarizer.needs_summary(
+                        summary_states.get(item['link'], {}), title, item['context'])):
+                    item['summary'] = self.news_summarizer.summarize_values(title, item['context'])
+                return item
+
+            # 擷取與摘要的網路等待互相重疊，資料庫寫入只在目前執行緒進行
+            pipeline = (
+                Pipeline(INGEST_QUEUE_SIZE)
+                .add_stage('擷取', fetch_stage, self.content_fetcher.max_workers)
+                .add_stage('摘要', summarize_stage, INGEST_SUMMARIZE_WORKERS)
+            )
+            items = (
+                {'link': link, 'news_data': news_data, 'existing_news': existing_news,
+                 'content': None, 'context': None, 'summary': None, 'error': None}
+                for link, (news_data, existing_news) in pending.items()
+            )
+            processed = set()
+            for item in pipeline.run(items):
+                processed.add(item['link'])
+                news_data = item['news_data']
+                if item['error']:
+                    failed_entries[news_data['feed_id']] += 1
+                    continue
+
+                try:
+                    news_id = upsert_news_with_content(db, news_data, item['content'])
+                    logging.info(f"成功爬取新聞：{news_data['title']}")
+                    # 壓縮後的正文存回 News，之後的貼文與圖片生成直接沿用
+                    self.context_compressor.save_news_context(db, news_id, item['content'], item['context'])
+                    if item['summary']:
+                        update_news_summaries(db, {news_id: item['summary']})
+                except Exception as e:
+                    logging.error(f"處理新聞時發生錯誤：{str(e)},{item['link']}")
+                    db.rollback()
+                    failed_entries[news_data['feed_id']] += 1
+
+            # 管線中因未預期錯誤被丟棄的新聞也視為失敗
+            for link, (news_data, _) in pending.items():
+                if link not in processed:
+                    failed_entries[news_data['feed_id']] += 1
+
+            if clusters:
+                self._store_clusters(db, clusters, duplicates, failed_entries)
+
+            for poll_result in poll_results:
+                feed_id = poll_result['feed']['feed_id']
+                if poll_result['error']:
+                    continue
+                # 有新聞處理失敗時不保存驗證標頭，下次執行會重新下載完整 Feed 以便重試
+                if failed_entries[feed_id]:
+                    update_feed_fetch_state(db, feed_id)
+                else:
+                    update_feed_fetch_state(db, feed_id, poll_result['etag'], poll_result['last_modified'])
+
+            self.feed_scheduler.schedule(db, poll_results)
+
+    def ingest_summary_batches(self):
+        """寫回已完成的摘要批次任務，延後摘要的新聞在下一輪擷取時即可被選擇"""
+        try:
+            self.batch_summarizer.ingest()
+        except Exception as e:
+            # 批次 API 暫時無法使用時不影響擷取，下一輪再寫回
+            logging.error(f"寫回摘要批次任務時發生錯誤：{str(e)}")
+
+    def _store_clusters(self, db, clusters, duplicates, failed_entries):
+        # 代表在本次才寫入，寫入後才有 ID 可供重複的新聞引用
+        news_ids = get_news_ids_by_links(db, list(clusters) + list(clusters.values()))
+        updates = {}
+        for link, representative in clusters.items():
+            cluster_id = news_ids.get(representative)
+            if link not in duplicates:
+                # 重複的新聞也已擷取內容，只補上所屬群組
+                if cluster_id is not None and link in news_ids:
+                    updates[news_ids[link]] = cluster_id
+                continue
+
+            news_data = duplicates[link]
+            if cluster_id is None:
+                # 代表擷取失敗，視為失敗讓下次重新下載 Feed 時一併重試
+                failed_entries[news_data['feed_id']] += 1
+                continue
+            try:
+                insert_duplicate_news(db, news_data, cluster_id)
+            except Exception as e:
+                logging.error(f"處理新聞時發生錯誤：{str(e)},{link}")
+                db.rollback()
+                failed_entries[news_data['feed_id']] += 1
+
+        if updates:
+            update_news_clusters(db, updates)
+        if duplicates:
+            logging.info(f"略過 {len(duplicates)} 篇與其他媒體重複的新聞，未擷取內容與摘要")
+
+    def re_summarize_stored_news(self, dry_run=False, batch_size=200):
+        """不重新爬取，只為輸入、提示或模型有變更的已存新聞重新產生摘要"""
+        redone = 0
+        failed = 0
+        with self.SessionLocal() as db:
+            news_ids = [news_id for (news_id,) in db.query(News.id).filter(News.md_file_id.isnot(None)).order_by(News.id)]
+            for start in range(0, len(news_ids), batch_size):
+                for news in db.query(News).filter(News.id.in_(news_ids[start:start + batch_size])).all():
+                    state = {
+                        'ai_summary': news.ai_summary,
+                        'summary_input_hash': news.summary_input_hash,
+                        'summary_prompt_version': news.summary_prompt_version,
+                        'summary_model': news.summary_model,
+                    }
+                    news_id, title = news.id, news.title
+                    context = self.context_compressor.get_news_context(db, news, persist=not dry_run)
+                    if not self.news_summarizer.needs_summary(state, title, context):
+                        continue
+
+                    redone += 1
+                    if not dry_run and not self.news_summarizer.summarize_and_save(db, news_id, title, context):
+                        failed += 1
+
+        if dry_run:
+            logging.info(f"共 {len(news_ids)} 篇新聞，其中 {redone} 篇需要重新摘要")
+        else:
+            logging.info(f"已重新摘要 {redone} 篇新聞（失敗 {failed} 篇），其餘 {len(news_ids) - redone} 篇未變更")
+        return redone
 
     def choose_and_generate_post(self, num_chosen):
-        chooser = NewsChooser(num_chosen)
+        chooser = NewsChooser(num_chosen, engine=self.engine)
         chooser.run()
                     
         # 生成 Instagram 貼文並存入資料庫
@@ -138,8 +333,8 @@ class InfoEssence:
             else:
                 logging.warning("沒有找到最新的已選擇新聞")
 
-def run_complete_process():
-    info_essence = InfoEssence()
+def run_complete_process(info_essence=None):
+    info_essence = info_essence or InfoEssence()
     info_essence.update_media_and_feeds()
     info_essence.fetch_and_store_news()
     if is_posting_time():
@@ -148,26 +343,79 @@ def run_complete_process():
     else:
         logging.info("現在是台灣時間 2:00 到 5:59，跳過發布貼文")
 
+def run_daemon(info_essence=None):
+    # 常駐單一行程，重複使用已載入的模組、資料庫連線池、HTTP 連線與字體
+    info_essence = info_essence or InfoEssence()
+    stop_event = threading.Event()
+
+    def handle_stop(signum, frame):
+        logging.info(f"收到信號 {signum}，完成目前工作後停止常駐模式")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    info_essence.update_media_and_feeds()
+    next_ingest = next_post = time.monotonic()
+    logging.info(f"常駐模式啟動：每 {DAEMON_INGEST_INTERVAL} 秒擷取新聞，每 {DAEMON_POST_INTERVAL} 秒發布貼文")
+
+    while not stop_event.is_set():
+        if time.monotonic() >= next_ingest:
+            next_ingest = time.monotonic() + DAEMON_INGEST_INTERVAL
+            try:
+                info_essence.fetch_and_store_news()
+            except Exception:
+                logging.exception("常駐模式擷取新聞時發生錯誤")
+
+        if not stop_event.is_set() and time.monotonic() >= next_post:
+            next_post = time.monotonic() + DAEMON_POST_INTERVAL
+            if is_posting_time():
+                try:
+                    info_essence.choose_and_generate_post(DAEMON_NUM_CHOSEN)
+                    info_essence.instagram_poster.auto_post()
+                except Exception:
+                    logging.exception("常駐模式發布貼文時發生錯誤")
+            else:
+                logging.info("現在是台灣時間 2:00 到 5:59，跳過發布貼文")
+
+        stop_event.wait(max(0, min(next_ingest, next_post) - time.monotonic()))
+
+    close_http_client()
+    logging.info("常駐模式已停止")
+
 def main():
     parser = argparse.ArgumentParser(description="InfoEssence: RSS Feed 處理器")
     parser.add_argument('-u', '--update', action='store_true', help='更新媒體和 Feed 資訊')
     parser.add_argument('-f', '--fetch', action='store_true', help='獲取並存儲新聞')
     parser.add_argument('--re-crawl', action='store_true', help='重新爬取所有新聞內容')
-    parser.add_argument('--re-summarize', action='store_true', help='重新進行新聞總結')
+    parser.add_argument('--re-summarize', action='store_true', help='只為內容、提示或模型有變更的新聞重新總結；未搭配 --fetch 時處理所有已存新聞')
+    parser.add_argument('--dry-run', action='store_true', help='搭配 --re-summarize（不可與 --fetch 同時使用），只回報需要重新總結的新聞數')
+    parser.add_argument('--defer-summary', action='store_true', help='只擷取內容，摘要稍後以 batch_summarizer 批次產生')
+    parser.add_argument('--fetch-duplicates', action='store_true', help='與其他媒體重複的新聞也擷取內容並摘要，只標記所屬群組')
     parser.add_argument('--choose', type=int, help='選擇指定數量的重要新聞並生成圖片')
     parser.add_argument('--post', action='store_true', help='自動選擇並發布新聞到 Instagram')
     parser.add_argument('--list-posts', action='store_true', help='列出最新的 Instagram 貼文')
+    parser.add_argument('--daemon', action='store_true', help='以常駐模式依排程持續擷取、選擇並發布新聞')
     args = parser.parse_args()
+    # --dry-run 只在不重新爬取的重新總結中回報數量，搭配 --fetch 時會實際擷取並寫入資料庫
+    if args.dry_run and (args.fetch or not args.re_summarize):
+        parser.error('--dry-run 只能搭配 --re-summarize 使用，且不能與 --fetch 同時使用')
 
     info_essence = InfoEssence()
 
-    if not any(vars(args).values()):
-        run_complete_process()
+    if args.daemon:
+        run_daemon(info_essence)
+    elif not any(vars(args).values()):
+        run_complete_process(info_essence)
     else:
         if args.update:
             info_essence.update_media_and_feeds()
         if args.fetch:
-            info_essence.fetch_and_store_news(re_crawl=args.re_crawl, re_summarize=args.re_summarize)
+            info_essence.fetch_and_store_news(re_crawl=args.re_crawl, re_summarize=args.re_summarize,
+                                              defer_summary=args.defer_summary,
+                                              fetch_duplicates=args.fetch_duplicates or NEWS_CLUSTERING_FETCH_DUPLICATES)
+        elif args.re_summarize:
+            info_essence.re_summarize_stored_news(dry_run=args.dry_run)
         if args.choose:
             info_essence.choose_and_generate_post(args.choose)
         if args.post:
@@ -1,8 +1,10 @@
 import os
-import requests
+import httpx
 from dotenv import load_dotenv, set_key
 import logging
 from datetime import datetime
+from src.config.settings import GRAPH_API_URL
+from src.utils import http_client
 
 # 設置日誌
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -21,7 +23,7 @@ def refresh_instagram_token():
         return
 
     # 構建 API 請求 URL
-    url = f"https://graph.facebook.com/v0.22/oauth/access_token"
+    url = f"{GRAPH_API_URL}/v0.22/oauth/access_token"
     params = {
         "grant_type": "fb_exchange_token",
         "client_id": app_id,
@@ -31,8 +33,8 @@ def refresh_instagram_token():
 
     try:
         # 發送請求以刷新 token
-        response = requests.get(url, params=params)
-        if not response.ok:
+        response = http_client.get(url, params=params)
+        if not response.is_success:
             error_details = response.json() if response.text else "No error details available"
             logging.error(f"API Error Response: Status Code: {response.status_code}, Details: {error_details}")
             logging.error(f"Request Parameters (excluding secret): client_id={app_id}, grant_type=fb_exchange_token")
@@ -47,7 +49,7 @@ def refresh_instagram_token():
         # 更新 .env 文件中的 token
         env_path = '.env'
         set_key(env_path, 'INSTAGRAM_ACCESS_TOKEN', new_token)
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logging.error(f"Error refreshing token: {e}")
     except KeyError:
         logging.error("Unexpected response format from Facebook API")
@@ -0,0 +1,216 @@
+import logging
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+from src.config.settings import RSS_CONFIG, ARTICLE_EXTRACTION_MIN_LENGTH, ARTICLE_EXTRACTION_TIMEOUT
+from src.utils import http_client
+
+logger = logging.getLogger(__name__)
+
+# 一般網站的雜訊區塊，轉換時直接略過
+BOILERPLATE_TAGS = ['script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form',
+                    'iframe', 'svg', 'button', 'figure', 'picture', 'video', 'audio']
+
+# 找不到媒體專屬規則時依序嘗試的正文選擇器
+DEFAULT_CONTENT_SELECTORS = ['article', '[itemprop="articleBody"]', 'main', '[role="main"]']
+
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/124.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml',
+}
+
+class ArticleExtractionException(Exception):
+    """本地正文擷取失敗，應改用 Jina Reader"""
+    pass
+
+class ArticleExtractor:
+    def __init__(self, rss_config: Dict = RSS_CONFIG, min_length: int = ARTICLE_EXTRACTION_MIN_LENGTH,
+                 timeout: float = ARTICLE_EXTRACTION_TIMEOUT):
+        self.min_length = min_length
+        self.timeout = timeout
+        self.rules_by_host = self._load_rules(rss_config)
+
+    @staticmethod
+    def _load_rules(rss_config: Dict) -> Dict[str, Dict]:
+        # 以媒體網址、Feed 網址與額外設定的主機名稱對應到 rss_feed.yaml 中的 extractor 規則
+        rules_by_host = {}
+        for media_info in rss_config.values():
+            rules = media_info.get('extractor')
+            if not rules:
+                continue
+            hosts = {urlparse(media_info['url']).netloc}
+            hosts.update(urlparse(feed['url']).netloc for feed in media_info.get('feeds', []))
+            hosts.update(rules.get('hosts', []))
+            for host in hosts:
+                rules_by_host[ArticleExtractor._normalize_host(host)] = rules
+        return rules_by_host
+
+    @staticmethod
+    def _normalize_host(host: str) -> str:
+        host = host.lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def get_rules(self, url: str) -> Dict:
+        host = self._normalize_host(urlparse(url).netloc)
+        while host:
+            if host in self.rules_by_host:
+                return self.rules_by_host[host]
+            # 子網域沿用上層網域的規則，例如 feeds.bbci.co.uk -> bbci.co.uk
+            host = host.partition('.')[2] if host.count('.') > 1 else ''
+        return {}
+
+    def is_enabled(self, url: str) -> bool:
+        return self.get_rules(url).get('enabled', True)
+
+    def fetch_and_extract(self, url: str) -> str:
+        if not self.is_enabled(url):
+            raise ArticleExtractionException(f"此網站未啟用本地擷取：{url}")
+        response = http_client.get(url, headers=BROWSER_HEADERS, timeout=self.timeout)
+        if response.status_code != 200:
+            raise ArticleExtractionException(f"下載文章失敗：URL：{url} - 狀態碼：{response.status_code}")
+        return self.extract(str(response.url), response.text)
+
+    def extract(self, url: str, html: str) -> str:
+        """將文章 HTML 轉為與 Jina Reader 相同格式的 Markdown"""
+        rules = self.get_rules(url)
+        soup = BeautifulSoup(html, 'lxml')
+
+        title = self._extract_title(soup)
+        published_time = self._meta_content(soup, 'article:published_time')
+
+        content_root = self._find_content_root(soup, rules.get('content_selector'))
+        if content_root is None:
+            raise ArticleExtractionException(f"找不到文章正文：URL：{url}")
+
+        for selector in BOILERPLATE_TAGS + rules.get('remove', []):
+            for element in content_root.select(selector):
+                element.decompose()
+
+        markdown = self._to_markdown(content_root, url)
+        if len(markdown) < self.min_length:
+            raise ArticleExtractionException(f"擷取的正文過短（{len(markdown)} 字元）：URL：{url}")
+
+        lines = [f"Title: {title}", "", f"URL Source: {url}", ""]
+        if published_time:
+            lines += [f"Published Time: {published_time}", ""]
+        lines += ["Markdown Content:", markdown]
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _meta_content(soup: BeautifulSoup, name: str) -> Optional[str]:
+        meta = soup.find('meta', attrs={'property': name}) or soup.find('meta', attrs={'name': name})
+        return meta.get('content', '').strip() if meta else None
+
+    def _extract_title(self, soup: BeautifulSoup) -> str:
+        title = self._meta_content(soup, 'og:title')
+        if not title and soup.find('h1'):
+            title = soup.find('h1').get_text(' ', strip=True)
+        if not title and soup.title:
+            title = soup.title.get_text(strip=True)
+        return title or ''
+
+    def _find_content_root(self, soup: BeautifulSoup, content_selector) -> Optional[Tag]:
+        selectors = content_selector if isinstance(content_selector, list) else [content_selector] if content_selector else []
+        for selector in selectors + DEFAULT_CONTENT_SELECTORS:
+            candidates = soup.select(selector)
+            if candidates:
+                # 同一選擇器命中多個區塊時，取段落文字最多的一個
+                return max(candidates, key=self._paragraph_length)
+
+        # 沒有語意標籤時，以段落文字最多的區塊作為正文
+        containers = {p.parent for p in soup.find_all('p') if p.parent is not None}
+        return max(containers, key=self._paragraph_length, default=None)
+
+    @staticmethod
+    def _paragraph_length(element: Tag) -> int:
+        return sum(len(p.get_text(strip=True)) for p in element.find_all('p'))
+
+    def _to_markdown(self, root: Tag, base_url: str) -> str:
+        blocks: List[str] = []
+        self._render_blocks(root, base_url, blocks)
+        markdown = '\n\n'.join(block for block in blocks if block.strip())
+        return re.sub(r'\n{3,}', '\n\n', markdown).strip()
+
+    def _render_blocks(self, element: Tag, base_url: str, blocks: List[str]) -> None:
+        for child in element.children:
+            if isinstance(child, NavigableString):
+                text = str(child).strip()
+                if text and child.__class__ is NavigableString:
+                    blocks.append(text)
+                continue
+            if not isinstance(child, Tag):
+                continue
+
+            name = child.name
+            if re.fullmatch(r'h[1-6]', name):
+                blocks.append(f"{'#' * int(name[1])} {self._render_inline(child, base_url)}")
+            elif name == 'p':
+                blocks.append(self._render_inline(child, base_url))
+            elif name in ('ul', 'ol'):
+                items = child.find_all('li', recursive=False)
+                blocks.append('\n'.join(
+                    f"{f'{i}.' if name == 'ol' else '-'} {self._render_inline(item, base_url)}"
+                    for i, item in enumerate(items, 1)
+                ))
+            elif name == 'blockquote':
+                quote = self._render_inline(child, base_url)
+                blocks.append('\n'.join(f"> {line}" for line in quote.splitlines()))
+            elif name == 'pre':
+                blocks.append(f"```\n{child.get_text()}\n```")
+            elif name == 'table':
+                rows = [
+                    [cell.get_text(' ', strip=True) for cell in row.find_all(['th', 'td'])]
+                    for row in child.find_all('tr')
+                ]
+                rows = [row for row in rows if row]
+                if rows:
+                    lines = ['| ' + ' | '.join(rows[0]) + ' |', '| ' + ' | '.join('---' for _ in rows[0]) + ' |']
+                    lines += ['| ' + ' | '.join(row) + ' |' for row in rows[1:]]
+                    blocks.append('\n'.join(lines))
+            else:
+                self._render_blocks(child, base_url, blocks)
+
+    def _render_inline(self, element: Tag, base_url: str) -> str:
+        parts = []
+        for child in element.children:
+            if isinstance(child, NavigableString):
+                if child.__class__ is NavigableString:
+                    parts.append(str(child))
+                continue
+            if not isinstance(child, Tag):
+                continue
+            text = self._render_inline(child, base_url)
+            if child.name == 'a' and child.get('href') and text.strip():
+                parts.append(f"[{text.strip()}]({urljoin(base_url, child['href'])})")
+            elif child.name in ('strong', 'b') and text.strip():
+                parts.append(f"**{text.strip()}**")
+            elif child.name in ('em', 'i') and text.strip():
+                parts.append(f"_{text.strip()}_")
+            elif child.name == 'br':
+                parts.append('\n')
+            else:
+                parts.append(text)
+        return re.sub(r'[ \t\r\f\v]+', ' ', ''.join(parts)).strip()
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="以本地規則將文章 HTML 轉為 Markdown")
+    parser.add_argument('html_file', help='已儲存的文章 HTML 檔案')
+    parser.add_argument('--url', required=True, help='文章原始網址，用於套用媒體規則與補全連結')
+    args = parser.parse_args()
+
+    with open(args.html_file, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    try:
+        print(ArticleExtractor().extract(args.url, html))
+    except ArticleExtractionException as e:
+        print(f"擷取失敗：{e}")
+
+if __name__ == "__main__":
+    main()
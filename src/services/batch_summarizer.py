@@ -0,0 +1,193 @@
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, Session
+
+from src.config.settings import (
+    DATABASE_URL,
+    BATCH_SUMMARY_MODEL,
+    BATCH_SUMMARY_MAX_REQUESTS,
+    BATCH_SUMMARY_COMPLETION_WINDOW,
+)
+from src.database.models import SummaryBatch
+from src.database.operations import (
+    get_pending_summary_news,
+    create_summary_batch,
+    get_open_summary_batches,
+    update_news_summaries,
+)
+from src.services.context_compressor import ContextCompressor
+from src.services.news_summarizer import NewsSummarizer
+from src.utils.openai_client import get_openai_client
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# 批次任務的終止狀態，completed 以外的狀態代表沒有可寫回的結果
+FINISHED_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+class BatchSummarizer:
+    """將尚未摘要的新聞寫成 JSONL 批次任務提交，完成後再把結果寫回 news"""
+
+    def __init__(self, engine=None, model: str = BATCH_SUMMARY_MODEL,
+                 max_requests: int = BATCH_SUMMARY_MAX_REQUESTS,
+                 completion_window: str = BATCH_SUMMARY_COMPLETION_WINDOW):
+        self.client = get_openai_client()
+        self.engine = engine or create_engine(DATABASE_URL)
+        self.SessionLocal = sessionmaker(bind=self.engine)
+        self.model = model
+        self.max_requests = max_requests
+        self.completion_window = completion_window
+        self.news_summarizer = NewsSummarizer()
+        self.context_compressor = ContextCompressor()
+
+    @staticmethod
+    def custom_id(news_id: int) -> str:
+        return f"news-{news_id}"
+
+    def build_jsonl(self, db: Session, news_list: List) -> tuple:
+        """回傳 JSONL 內容與各新聞的摘要輸入雜湊"""
+        lines = []
+        input_hashes = []
+        for news in news_list:
+            context = self.context_compressor.get_news_context(db, news)
+            input_hashes.append(self.news_summarizer.input_hash(news.title, context))
+            body = self.news_summarizer.build_request_body(news.title, context, self.model)
+            # 批次任務無法重試，直接要求模型呼叫工具
+            body["tool_choice"] = {"type": "function", "function": {"name": "output_title_and_summary"}}
+            lines.append(json.dumps({
+                "custom_id": self.custom_id(news.id),
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": body,
+            }, ensure_ascii=False))
+        return ('\n'.join(lines) + '\n').encode('utf-8'), input_hashes
+
+    def submit(self, limit: int = None) -> List[str]:
+        """提交尚未摘要的新聞，每個批次最多 max_requests 筆，回傳批次 ID"""
+        batch_ids = []
+        with self.SessionLocal() as db:
+            remaining = limit
+            while remaining is None or remaining > 0:
+                size = self.max_requests if remaining is None else min(self.max_requests, remaining)
+                news_list = get_pending_summary_news(db, size)
+                if not news_list:
+                    break
+
+                news_ids = [news.id for news in news_list]
+                jsonl, input_hashes = self.build_jsonl(db, news_list)
+                input_file = self.client.files.create(
+                    file=("summaries.jsonl", jsonl),
+                    purpose="batch",
+                )
+                batch = self.client.batches.create(
+                    input_file_id=input_file.id,
+                    endpoint=BATCH_ENDPOINT,
+                    completion_window=self.completion_window,
+                    metadata={"source": "infoessence-summaries"},
+                )
+                create_summary_batch(db, batch.id, input_file.id, batch.status, self.model, news_ids,
+                                     self.news_summarizer.prompt_version, input_hashes)
+                logger.info(f"已提交摘要批次 {batch.id}，共 {len(news_ids)} 篇新聞")
+                batch_ids.append(batch.id)
+
+                if remaining is not None:
+                    remaining -= len(news_ids)
+                if len(news_ids) < size:
+                    break
+        return batch_ids
+
+    def parse_output(self, text: str) -> Dict[int, tuple]:
+        """解析批次輸出檔，回傳 {news_id: (ai_title, ai_summary)}"""
+        summaries = {}
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            news_id = int(record["custom_id"].split("-", 1)[1])
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                logger.warning(f"新聞 ID {news_id} 的批次摘要失敗：{record.get('error') or response.get('status_code')}")
+                continue
+
+            try:
+                tool_call = response["body"]["choices"][0]["message"]["tool_calls"][0]["function"]
+                result = self.news_summarizer.parse_tool_call(tool_call["name"], tool_call["arguments"])
+            except Exception as e:
+                logger.warning(f"無法解析新聞 ID {news_id} 的批次摘要：{e}")
+                continue
+            if result:
+                summaries[news_id] = (result.ai_title, result.ai_summary)
+        return summaries
+
+    def ingest(self) -> int:
+        """檢查進行中的批次任務，把已完成的結果寫回 news，回傳寫回的新聞數"""
+        ingested = 0
+        with self.SessionLocal() as db:
+            for summary_batch in get_open_summary_batches(db):
+                batch = self.client.batches.retrieve(summary_batch.batch_id)
+                summary_batch.status = batch.status
+                summary_batch.output_file_id = batch.output_file_id
+                summary_batch.error_file_id = batch.error_file_id
+
+                if batch.status not in FINISHED_STATUSES:
+                    db.commit()
+                    logger.info(f"摘要批次 {batch.id} 尚未完成：{batch.status}")
+                    continue
+
+                if batch.status == 'completed' and batch.output_file_id:
+                    summaries = self.parse_output(self.client.files.content(batch.output_file_id).text)
+                    input_hashes = dict(zip(summary_batch.news_ids, summary_batch.input_hashes or []))
+                    update_news_summaries(db, {
+                        news_id: {
+                            'ai_title': ai_title,
+                            'ai_summary': ai_summary,
+                            'summary_input_hash': input_hashes.get(news_id),
+                            'summary_prompt_version': summary_batch.prompt_version,
+                            'summary_model': summary_batch.model,
+                        }
+                        for news_id, (ai_title, ai_summary) in summaries.items()
+                    })
+                    ingested += len(summaries)
+                    logger.info(f"摘要批次 {batch.id} 已寫回 {len(summaries)}/{len(summary_batch.news_ids)} 篇新聞")
+                else:
+                    logger.warning(f"摘要批次 {batch.id} 結束但沒有結果：{batch.status}")
+
+                # 失敗或未寫回的新聞仍沒有摘要，下次提交時會重新排入
+                summary_batch.ingested_at = datetime.now(timezone.utc)
+                db.commit()
+        return ingested
+
+    def status(self) -> List[SummaryBatch]:
+        with self.SessionLocal() as db:
+            return get_open_summary_batches(db)
+
+def main():
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="以批次任務 API 為尚未摘要的新聞產生摘要")
+    parser.add_argument('action', choices=['submit', 'ingest', 'status'],
+                        help="選擇操作：submit（提交批次任務）、ingest（寫回已完成的結果）或 status（列出進行中的批次）")
+    parser.add_argument('--limit', type=int, help='本次最多提交的新聞數')
+    args = parser.parse_args()
+
+    summarizer = BatchSummarizer()
+    if args.action == 'submit':
+        batch_ids = summarizer.submit(args.limit)
+        print(f"已提交 {len(batch_ids)} 個批次任務：{', '.join(batch_ids)}" if batch_ids else "沒有需要摘要的新聞")
+    elif args.action == 'ingest':
+        print(f"已寫回 {summarizer.ingest()} 篇新聞摘要")
+    elif args.action == 'status':
+        batches = summarizer.status()
+        if not batches:
+            print("沒有進行中的批次任務")
+        for batch in batches:
+            print(f"{batch.batch_id}：{batch.status}，{len(batch.news_ids)} 篇新聞，建立於 {batch.created_at}")
+
+if __name__ == "__main__":
+    main()
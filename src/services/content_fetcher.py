@@ -1,10 +1,19 @@
-import requests
+import httpx
 import time
 import logging
-from ratelimit import limits, sleep_and_retry
-from src.config.settings import JINA_API_URL
-from src.database.operations import upsert_news_with_content
-from sqlalchemy.orm import Session
+from src.config.settings import (
+    JINA_API_URL,
+    CONTENT_FETCH_MAX_WORKERS,
+    CONTENT_FETCH_MAX_ATTEMPTS,
+    CONTENT_FETCH_TIMEOUT,
+    ARTICLE_EXTRACTION_ENABLED,
+    FETCH_CACHE_ENABLED,
+    RATE_LIMITS,
+)
+from src.services.article_extractor import ArticleExtractor
+from src.utils import http_client
+from src.utils.fetch_cache import FetchCache
+from src.utils.rate_limiter import get_rate_limiter, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -13,49 +22,76 @@ class ContentFetchException(Exception):
     pass
 
 class ContentFetcher:
-    def __init__(self, db: Session):
-        self.db = db
+    # 這些狀態碼代表上游暫時無法處理，值得重試
+    RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(self, max_workers: int = CONTENT_FETCH_MAX_WORKERS,
+                 max_attempts: int = CONTENT_FETCH_MAX_ATTEMPTS, timeout: float = CONTENT_FETCH_TIMEOUT,
+                 local_extraction: bool = ARTICLE_EXTRACTION_ENABLED, use_cache: bool = FETCH_CACHE_ENABLED):
         self.jina_api_url = JINA_API_URL
+        self.article_extractor = ArticleExtractor() if local_extraction else None
+        self.fetch_cache = FetchCache() if use_cache else None
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.rate_limiter = get_rate_limiter('jina', **RATE_LIMITS['jina'])
+
+    def fetch_content(self, url: str, bypass_cache: bool = False) -> str:
+        """bypass_cache 時不讀取快取、一律重新擷取（重新爬取用），結果仍會寫回快取"""
+        if self.fetch_cache and not bypass_cache:
+            content = self.fetch_cache.get(url)
+            if content is not None:
+                return content
+
+        content = self._fetch_from_network(url)
+        if self.fetch_cache:
+            self.fetch_cache.set(url, content)
+        return content
+
+    def _fetch_from_network(self, url: str) -> str:
+        # 優先在本地擷取正文，不受 Jina 的速率限制
+        if self.article_extractor and self.article_extractor.is_enabled(url):
+            try:
+                return self.article_extractor.fetch_and_extract(url)
+            except Exception as e:
+                logger.info(f"本地擷取失敗，改用 Jina Reader：URL：{url} - 原因：{e}")
+
+        return self._fetch_from_jina(url)
 
-    @sleep_and_retry
-    @limits(calls=20, period=60)  # 每分鐘 20 次請求
-    def fetch_and_save_content(self, url: str, news_data: dict) -> str:
+    def _fetch_from_jina(self, url: str) -> str:
         jina_reader_url = f"{self.jina_api_url}/{url}"
-        
-        for attempt in range(2):  # 最多嘗試 2 次
+
+        for attempt in range(self.max_attempts):
+            self.rate_limiter.acquire()
             try:
                 response = self._make_request(jina_reader_url)
-                if response.status_code == 200:
-                    content = response.text
-                    news_id = upsert_news_with_content(self.db, news_data, content)
-                    self._log_fetched_news(news_data['title'])
-                    return content
-                
-                # 處理非 200 狀態碼
-                response.raise_for_status()
-            except requests.RequestException as e:
-                self._handle_request_exception(e, attempt, url)
+            except httpx.HTTPError as e:
+                logger.warning(f"爬取內容失敗：URL：{url} - 錯誤：{e}，嘗試次數：{attempt + 1}")
+                self._backoff(attempt)
+                continue
+
+            if response.status_code == 200:
+                return response.text
+
+            if response.status_code not in self.RETRYABLE_STATUS_CODES:
+                # 451 等無法重試的錯誤直接放棄，不佔用後續的請求額度
+                raise ContentFetchException(f"爬取內容失敗：URL：{url} - 狀態碼：{response.status_code}")
+
+            if response.status_code == 429:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'), default=2 ** (attempt + 1))
+                logger.warning(f"達到速率限制，暫停 Jina 請求 {retry_after:.0f} 秒。嘗試次數：{attempt + 1}")
+                # 只暫停同一上游的令牌桶，其他工作不受影響
+                self.rate_limiter.pause(retry_after)
+            else:
+                logger.warning(f"爬取內容失敗：URL：{url} - 狀態碼：{response.status_code}，嘗試次數：{attempt + 1}")
+                self._backoff(attempt)
 
         raise ContentFetchException(f"多次嘗試後仍無法獲取內容：URL：{url}")
 
     def _make_request(self, url):
-        return requests.get(url, timeout=100)
-
-    def _handle_successful_response(self, response, url):
-        logger.info(f"成功獲取內容：{url}")
-        time.sleep(3)  # 每次成功請求後休眠 3 秒
-        return response.text
-
-    def _handle_request_exception(self, e, attempt, url):
-        if "429" in str(e):
-            logger.warning(f"達到速率限制，增加休眠時間。嘗試次數：{attempt + 1}")
-            time.sleep(60 * (attempt + 1))  # 隨著嘗試次數增加休眠時間
-        elif "451" in str(e):
-            logger.error(f"爬取內容失敗：URL：{url} - 錯誤：{e}")
-            time.sleep(3)
-        else:
-            logger.error(f"爬取內容失敗：URL：{url} - 錯誤：{e}")
-            time.sleep(10)
-
-    def _log_fetched_news(self, title):
-        logger.info(f"成功爬取新聞：{title}")
+        # 透過共用連線池，避免每篇文章都重新建立 TCP/TLS 連線
+        return http_client.get(url, timeout=self.timeout)
+
+    def _backoff(self, attempt):
+        # 指數退避只讓目前的工作執行緒等待
+        time.sleep(min(2 ** attempt, 10))
@@ -0,0 +1,177 @@
+import logging
+import re
+from functools import lru_cache
+from typing import List
+
+from sqlalchemy.orm import Session
+
+from src.config.settings import LLM_CONTEXT_TOKEN_BUDGET, LLM_CONTEXT_TOKENIZER
+from src.database.models import File, News
+from src.database.operations import compute_content_hash, update_news_context
+
+try:
+    import tiktoken
+except ImportError:  # 未安裝 tiktoken 時以字元數估算 token 數
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# 壓縮規則變更時遞增，讓資料庫中既有的 context 失效
+COMPRESSOR_VERSION = 1
+
+# Jina Reader 與本地擷取輸出的標頭欄位
+HEADER_PREFIXES = ('Title:', 'URL Source:', 'Published Time:', 'Warning:', 'Markdown Content:')
+
+IMAGE_PATTERN = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+LINK_PATTERN = re.compile(r'\[([^\]]*)\]\([^)\s]*(?:\s+"[^"]*")?\)')
+LINK_DEFINITION_PATTERN = re.compile(r'^\s*\[[^\]]+\]:\s*\S+')
+BARE_URL_PATTERN = re.compile(r'^\s*<?https?://\S+>?\s*$')
+RULE_PATTERN = re.compile(r'^\s*([=\-*_])(\s*\1){2,}\s*$')
+LIST_MARKER_PATTERN = re.compile(r'^\s*(?:[-*+]|\d+\.)\s+')
+CJK_PATTERN = re.compile(r'[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]')
+
+# 導覽列、訂閱提示、版權聲明等短行中常見的字詞
+BOILERPLATE_PATTERN = re.compile(
+    r'©|copyright|all rights reserved|sign up|sign in|log in|subscribe|newsletter|cookie|'
+    r'advertisement|skip to|follow us|share this|share on|read more|related articles|'
+    r'privacy policy|terms of (use|service)|download the app|most read|recommended',
+    re.IGNORECASE
+)
+BOILERPLATE_MAX_WORDS = 15
+
+# 裁切時最後一段至少保留的 token 數，太短的殘段直接捨棄
+MIN_PARTIAL_TOKENS = 50
+
+@lru_cache(maxsize=None)
+def _get_encoding(name: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"無法載入 tokenizer {name}，改以字元數估算 token 數：{e}")
+        return None
+
+class ContextCompressor:
+    """去除文章 Markdown 中的雜訊並裁切至 token 預算，結果依 News 快取"""
+
+    def __init__(self, token_budget: int = LLM_CONTEXT_TOKEN_BUDGET, tokenizer: str = LLM_CONTEXT_TOKENIZER):
+        self.token_budget = token_budget
+        self.tokenizer = tokenizer
+        self.encoding = _get_encoding(tokenizer)
+
+    def count_tokens(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        # 中日韓文字約一字一個 token，其他文字約四個字元一個 token
+        cjk = len(CJK_PATTERN.findall(text))
+        return cjk + (len(text) - cjk + 3) // 4
+
+    def strip_boilerplate(self, markdown: str) -> str:
+        # 只保留 Markdown Content 之後的正文
+        _, marker, body = markdown.partition('Markdown Content:')
+        if not marker:
+            body = '\n'.join(line for line in markdown.splitlines() if not line.startswith(HEADER_PREFIXES))
+
+        lines: List[str] = []
+        seen = set()
+        for line in body.splitlines():
+            line = IMAGE_PATTERN.sub('', line).rstrip()
+            if LINK_DEFINITION_PATTERN.match(line) or BARE_URL_PATTERN.match(line) or RULE_PATTERN.match(line):
+                continue
+
+            text = LINK_PATTERN.sub(r'\1', line)
+            # 整行只有連結的多半是導覽列或相關文章列表
+            if LINK_PATTERN.search(line) and not LIST_MARKER_PATTERN.sub('', LINK_PATTERN.sub('', line)).strip(' |·•-–—'):
+                continue
+            if len(text.split()) <= BOILERPLATE_MAX_WORDS and BOILERPLATE_PATTERN.search(text):
+                continue
+
+            stripped = text.strip()
+            if stripped:
+                if stripped in seen:
+                    continue
+                seen.add(stripped)
+            lines.append(text)
+
+        return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+    def trim_to_budget(self, text: str) -> str:
+        if self.count_tokens(text) <= self.token_budget:
+            return text
+
+        # 依段落順序保留，新聞的重點通常在前段
+        kept = []
+        used = 0
+        for paragraph in text.split('\n\n'):
+            tokens = self.count_tokens(paragraph)
+            if used + tokens > self.token_budget:
+                remaining = self.token_budget - used
+                if not kept or remaining >= MIN_PARTIAL_TOKENS:
+                    kept.append(self._truncate(paragraph, remaining))
+                break
+            kept.append(paragraph)
+            used += tokens
+        return '\n\n'.join(kept).strip()
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        if self.encoding is not None:
+            truncated = self.encoding.decode(self.encoding.encode(text, disallowed_special=())[:max_tokens])
+        else:
+            truncated = text
+            while truncated and self.count_tokens(truncated) > max_tokens:
+                truncated = truncated[:int(len(truncated) * max_tokens / self.count_tokens(truncated))]
+        # 避免切在單字中間
+        if len(truncated) < len(text) and ' ' in truncated:
+            truncated = truncated.rsplit(' ', 1)[0]
+        return truncated.rstrip() + ' …'
+
+    def compress(self, markdown: str) -> str:
+        return self.trim_to_budget(self.strip_boilerplate(markdown))
+
+    def context_key(self, content_hash: str) -> str:
+        tokenizer = self.tokenizer if self.encoding is not None else 'approx'
+        return f"v{COMPRESSOR_VERSION}:{tokenizer}:{self.token_budget}:{content_hash}"
+
+    def save_news_context(self, db: Session, news_id: int, markdown: str, context: str) -> None:
+        update_news_context(db, news_id, context, self.context_key(compute_content_hash(markdown.encode('utf-8'))))
+
+    def build_news_context(self, db: Session, news_id: int, markdown: str) -> str:
+        """壓縮剛寫入的文章內容並存回 News"""
+        context = self.compress(markdown)
+        self.save_news_context(db, news_id, markdown, context)
+        return context
+
+    def get_news_context(self, db: Session, news: News, persist: bool = True) -> str:
+        """取得新聞的壓縮正文，Markdown 或壓縮設定變更時才重新產生；persist 為 False 時不寫回資料庫"""
+        if not news.md_file_id:
+            return ''
+
+        # 只查詢雜湊，快取命中時不需讀取整份 Markdown
+        content_hash = db.query(File.content_hash).filter(File.id == news.md_file_id).scalar()
+        if content_hash and news.context is not None and news.context_key == self.context_key(content_hash):
+            return news.context
+
+        markdown = news.md_file.content.decode('utf-8')
+        if not persist:
+            return self.compress(markdown)
+        return self.build_news_context(db, news.id, markdown)
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="預覽文章 Markdown 壓縮後送入 LLM 的內容")
+    parser.add_argument('markdown_file', help='已儲存的文章 Markdown 檔案')
+    parser.add_argument('--budget', type=int, default=LLM_CONTEXT_TOKEN_BUDGET, help='token 預算')
+    args = parser.parse_args()
+
+    with open(args.markdown_file, 'r', encoding='utf-8') as f:
+        markdown = f.read()
+
+    compressor = ContextCompressor(token_budget=args.budget)
+    context = compressor.compress(markdown)
+    print(context)
+    print(f"\n原始 {compressor.count_tokens(markdown)} tokens -> 壓縮後 {compressor.count_tokens(context)} tokens")
+
+if __name__ == "__main__":
+    main()
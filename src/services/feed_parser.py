@@ -1,10 +1,135 @@
 import feedparser
-from typing import List, Dict
+import os
+from io import BytesIO
+from typing import Dict, Iterator, List
+from lxml import etree
+
+try:
+    # feedparser 未公開的清理函式，requirements.txt 固定了 feedparser 版本；
+    # 升級後無法匯入時停用快速路徑，全部改用 feedparser 解析
+    from feedparser.sanitizer import _sanitize_html
+except ImportError:
+    _sanitize_html = None
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+RSS1_NS = '{http://purl.org/rss/1.0/}'
+DC_NS = '{http://purl.org/dc/elements/1.1/}'
+
+ENTRY_TAGS = ('item', f'{RSS1_NS}item', f'{ATOM_NS}entry')
 
 class FeedParser:
     @staticmethod
     def parse_feed(url: str) -> List[Dict]:
         feed = feedparser.parse(url)
+        return FeedParser._to_entries(feed)
+
+    @staticmethod
+    def parse_content(content: bytes) -> List[Dict]:
+        # 解析已下載的 RSS 內容，讓網路請求可以交給 FeedPoller 並行處理
+        return list(FeedParser.iter_entries(content))
+
+    @staticmethod
+    def iter_entries(content: bytes) -> Iterator[Dict]:
+        """以 lxml 串流解析 RSS/Atom，格式錯誤時改用 feedparser"""
+        seen_links = set()
+        if _sanitize_html is None:
+            yield from FeedParser._to_entries(feedparser.parse(content))
+            return
+        try:
+            for entry in FeedParser._iter_entries_fast(content):
+                seen_links.add(entry['link'])
+                yield entry
+        except etree.LxmlError:
+            pass
+        else:
+            if seen_links:
+                return
+
+        # 已輸出的新聞不重複輸出
+        for entry in FeedParser._to_entries(feedparser.parse(content)):
+            if entry['link'] not in seen_links:
+                yield entry
+
+    @staticmethod
+    def _iter_entries_fast(content: bytes) -> Iterator[Dict]:
+        context = etree.iterparse(
+            BytesIO(content),
+            events=('end',),
+            tag=ENTRY_TAGS,
+            resolve_entities=False,
+            no_network=True,
+        )
+        for _, elem in context:
+            if elem.tag == f'{ATOM_NS}entry':
+                yield FeedParser._atom_entry(elem)
+            else:
+                yield FeedParser._rss_item(elem)
+
+            # 釋放已處理的節點，避免整份文件留在記憶體
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+    @staticmethod
+    def _child_text(elem, *tags) -> str:
+        for tag in tags:
+            child = elem.find(tag)
+            if child is not None:
+                text = ''.join(child.itertext()).strip()
+                if text:
+                    return text
+        return None
+
+    @staticmethod
+    def _html_text(elem, *tags) -> str:
+        """取出可能含 HTML 的內容，並以 feedparser 相同的規則移除 script、style 與事件屬性"""
+        for tag in tags:
+            child = elem.find(tag)
+            if child is None:
+                continue
+            content_type = child.get('type', 'text') if child.tag.startswith(ATOM_NS) else 'html'
+            if content_type == 'xhtml':
+                # xhtml 內容包在一層 div 內（RFC 4287），與 feedparser 相同只取 div 內的節點
+                nodes = list(child)
+                if len(nodes) == 1 and nodes[0].tag.endswith('div'):
+                    child = nodes[0]
+                text = ((child.text or '') + ''.join(etree.tostring(node, encoding='unicode', method='html', with_tail=True) for node in child)).strip()
+            else:
+                text = ''.join(child.itertext()).strip()
+            if not text:
+                continue
+            # Atom 的純文字內容不是 HTML，feedparser 也不清理
+            if content_type in ('html', 'xhtml', 'text/html', 'application/xhtml+xml'):
+                text = _sanitize_html(text, 'utf-8', 'text/html').strip()
+            return text
+        return None
+
+    @staticmethod
+    def _rss_item(elem) -> Dict:
+        ns = RSS1_NS if elem.tag.startswith(RSS1_NS) else ''
+        return {
+            'title': FeedParser._child_text(elem, f'{ns}title') or 'No title',
+            'link': FeedParser._child_text(elem, f'{ns}link') or 'No link',
+            'summary': FeedParser._html_text(elem, f'{ns}description') or 'No summary available',
+            'published': FeedParser._child_text(elem, 'pubDate', f'{DC_NS}date') or 'No publish date'
+        }
+
+    @staticmethod
+    def _atom_entry(elem) -> Dict:
+        link = None
+        for link_elem in elem.iterfind(f'{ATOM_NS}link'):
+            if link_elem.get('rel', 'alternate') == 'alternate':
+                link = link_elem.get('href')
+                break
+        return {
+            'title': FeedParser._child_text(elem, f'{ATOM_NS}title') or 'No title',
+            'link': link or 'No link',
+            'summary': FeedParser._html_text(elem, f'{ATOM_NS}summary', f'{ATOM_NS}content') or 'No summary available',
+            'published': FeedParser._child_text(elem, f'{ATOM_NS}published', f'{ATOM_NS}updated') or 'No publish date'
+        }
+
+    @staticmethod
+    def _to_entries(feed) -> List[Dict]:
         return [
             {
                 'title': entry.get('title', 'No title'),
@@ -13,4 +138,64 @@ class FeedParser:
                 'published': entry.get('published', entry.get('updated', 'No publish date'))
             }
             for entry in feed.entries
-        ]
\ No newline at end of file
+        ]
+
+def benchmark(paths: List[str], iterations: int = 20) -> None:
+    import time
+    import tracemalloc
+
+    if _sanitize_html is None:
+        raise SystemExit("無法匯入 feedparser 的 HTML 清理函式，lxml 快速路徑已停用")
+
+    parsers = {
+        'lxml': lambda content: list(FeedParser._iter_entries_fast(content)),
+        'feedparser': lambda content: FeedParser._to_entries(feedparser.parse(content)),
+    }
+
+    print(f"{'fixture':<28}{'parser':<12}{'entries':>8}{'entries/sec':>14}{'peak KiB':>12}")
+    mismatches = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        results = {}
+        for name, parse in parsers.items():
+            try:
+                entries = results[name] = parse(content)
+            except etree.LxmlError:
+                print(f"{os.path.basename(path):<28}{name:<12}{'格式錯誤，改用 feedparser':>34}")
+                continue
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                parse(content)
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            parse(content)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            rate = len(entries) * iterations / elapsed if elapsed else 0
+            print(f"{os.path.basename(path):<28}{name:<12}{len(entries):>8}{rate:>14.0f}{peak / 1024:>12.1f}")
+
+        # 快速路徑必須與 feedparser 輸出相同的內容（含清理後的 HTML 摘要）
+        if 'lxml' in results and results['lxml'] != results['feedparser']:
+            mismatches.append(os.path.basename(path))
+
+    if mismatches:
+        raise SystemExit(f"lxml 與 feedparser 的解析結果不一致：{', '.join(mismatches)}")
+    print("lxml 與 feedparser 的解析結果一致")
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    fixtures_dir = os.path.join(os.path.dirname(__file__), 'fixtures', 'feeds')
+
+    parser = argparse.ArgumentParser(description="比較 lxml 與 feedparser 的 RSS 解析效能")
+    parser.add_argument('paths', nargs='*', help='RSS/Atom 檔案路徑，預設使用 fixtures/feeds 內的檔案')
+    parser.add_argument('-n', '--iterations', type=int, default=20, help='每個檔案重複解析的次數')
+    args = parser.parse_args()
+
+    benchmark(args.paths or sorted(glob.glob(os.path.join(fixtures_dir, '*.xml'))), args.iterations)
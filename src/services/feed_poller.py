@@ -0,0 +1,80 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import httpx
+
+from src.config.settings import FEED_POLL_MAX_WORKERS, FEED_POLL_TIMEOUT, FEED_STANDIN_URL
+from src.services.feed_parser import FeedParser
+from src.utils import http_client
+
+logger = logging.getLogger(__name__)
+
+class FeedPoller:
+    """並行抓取多個 RSS Feed，每個主機的同時連線數由共用的 HTTP 連線池限制"""
+
+    def __init__(self, max_workers: int = FEED_POLL_MAX_WORKERS, timeout: float = FEED_POLL_TIMEOUT):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.feed_parser = FeedParser()
+
+    def _build_headers(self, feed: Dict, conditional: bool) -> Dict:
+        # Accept-Encoding 由 httpx 依已安裝的解碼器（gzip、br、zstd）自動帶入
+        headers = {}
+        if conditional:
+            if feed.get('etag'):
+                headers['If-None-Match'] = feed['etag']
+            if feed.get('last_modified'):
+                headers['If-Modified-Since'] = feed['last_modified']
+        return headers
+
+    def fetch_feed(self, feed: Dict, conditional: bool = True) -> Dict:
+        result = {
+            'feed': feed,
+            'entries': [],
+            'error': None,
+            'not_modified': False,
+            'etag': feed.get('etag'),
+            'last_modified': feed.get('last_modified'),
+            'elapsed': 0.0,
+            # 下次輪詢時間從開始輪詢時起算，不受後續抓取與摘要耗時影響
+            'polled_at': datetime.now(timezone.utc),
+        }
+        start = time.monotonic()
+        try:
+            # 替身模式下經由本地的 Feed 替身伺服器取得
+            url = f"{FEED_STANDIN_URL}/{feed['url']}" if FEED_STANDIN_URL else feed['url']
+            response = http_client.get(url, headers=self._build_headers(feed, conditional), timeout=self.timeout)
+
+            # 304 表示 Feed 未更新，直接略過解析與資料庫處理
+            if response.status_code == 304:
+                result['not_modified'] = True
+            else:
+                response.raise_for_status()
+                result['etag'] = response.headers.get('ETag')
+                result['last_modified'] = response.headers.get('Last-Modified')
+                result['entries'] = self.feed_parser.parse_content(response.content)
+        except httpx.HTTPError as e:
+            result['error'] = str(e)
+            logger.error(f"抓取 Feed 失敗：{feed['url']} - 錯誤：{e}")
+        except Exception as e:
+            result['error'] = str(e)
+            logger.error(f"解析 Feed 失敗：{feed['url']} - 錯誤：{e}")
+        result['elapsed'] = time.monotonic() - start
+        return result
+
+    def poll(self, feeds: List[Dict], conditional: bool = True) -> List[Dict]:
+        """並行抓取所有 Feed，回傳順序與輸入相同"""
+        if not feeds:
+            return []
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(feeds))) as executor:
+            results = list(executor.map(lambda feed: self.fetch_feed(feed, conditional), feeds))
+
+        failed = sum(1 for result in results if result['error'])
+        not_modified = sum(1 for result in results if result['not_modified'])
+        logger.info(f"已抓取 {len(feeds)} 個 Feed（未更新 {not_modified} 個，失敗 {failed} 個），耗時 {time.monotonic() - start:.2f} 秒")
+        return results
@@ -0,0 +1,72 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from src.config.settings import (
+    FEED_POLL_MIN_INTERVAL,
+    FEED_POLL_MAX_INTERVAL,
+    FEED_POLL_GRACE_PERIOD,
+    FEED_POLL_HISTORY_SIZE,
+)
+from src.database.operations import get_recent_publish_times, update_feed_schedules
+
+logger = logging.getLogger(__name__)
+
+class FeedScheduler:
+    """根據各 Feed 歷史發布時間推估輪詢間隔，只輪詢到期的 Feed"""
+
+    def __init__(self, min_interval: int = FEED_POLL_MIN_INTERVAL,
+                 max_interval: int = FEED_POLL_MAX_INTERVAL,
+                 grace_period: int = FEED_POLL_GRACE_PERIOD,
+                 history_size: int = FEED_POLL_HISTORY_SIZE):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.grace_period = grace_period
+        self.history_size = history_size
+
+    def due_feeds(self, feeds: List[Dict]) -> List[Dict]:
+        # 預留寬限時間，避免排程執行的微小誤差讓 Feed 延後一整輪
+        deadline = datetime.now(timezone.utc) + timedelta(seconds=self.grace_period)
+        due = [feed for feed in feeds if not feed.get('next_poll_at') or feed['next_poll_at'] <= deadline]
+        logger.info(f"共 {len(feeds)} 個 Feed，其中 {len(due)} 個到期需要輪詢")
+        return due
+
+    def estimate_interval(self, publish_times: List[datetime], now: datetime) -> int:
+        if len(publish_times) < 2:
+            return self.min_interval
+
+        publish_times = sorted(publish_times, reverse=True)
+        gaps = [
+            (newer - older).total_seconds()
+            for newer, older in zip(publish_times, publish_times[1:])
+        ]
+        # 每個發布間隔內輪詢兩次；Feed 久未更新（例如深夜）時逐步拉長間隔
+        interval = max(median(gaps) / 2, (now - publish_times[0]).total_seconds() / 4)
+        return int(min(max(interval, self.min_interval), self.max_interval))
+
+    def schedule(self, db: Session, poll_results: List[Dict]) -> None:
+        if not poll_results:
+            return
+
+        now = datetime.now(timezone.utc)
+        feed_ids = [result['feed']['feed_id'] for result in poll_results]
+        publish_times = get_recent_publish_times(db, feed_ids, self.history_size)
+
+        schedules = {}
+        for result in poll_results:
+            feed_id = result['feed']['feed_id']
+            # 從輪詢開始的時間起算，整輪執行較久時 Feed 仍能趕上下一次排程
+            polled_at = result.get('polled_at') or now
+            if result['error']:
+                # 抓取失敗時以最短間隔重試，保留原本推估的間隔
+                schedules[feed_id] = (result['feed'].get('poll_interval'), polled_at + timedelta(seconds=self.min_interval))
+                continue
+
+            interval = self.estimate_interval(publish_times.get(feed_id, []), polled_at)
+            schedules[feed_id] = (interval, polled_at + timedelta(seconds=interval))
+            logger.debug(f"Feed {result['feed']['url']} 下次輪詢間隔 {interval} 秒")
+
+        update_feed_schedules(db, schedules)
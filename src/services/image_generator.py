@@ -1,22 +1,24 @@
 import os
 from typing import Dict, Any
-from openai import OpenAI
 from pydantic import BaseModel
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session, joinedload
-import requests
+from src.utils import http_client
 
 from src.config.settings import OPENAI_API_KEY, DATABASE_URL
 from src.utils.database_utils import get_news_by_id, Session
 from src.database.models import News, File
 from src.database.operations import upsert_news_with_png
+from src.services.context_compressor import ContextCompressor
 from src.utils.file_utils import load_prompt_template
+from src.utils.openai_client import get_openai_client
 class ImagePrompt(BaseModel):
     dalle_prompt: str
 
 class ImageGenerator:
     def __init__(self):
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
+        self.client = get_openai_client()
+        self.context_compressor = ContextCompressor()
 
     def _generate_image_prompt(self, ai_title: str, ai_summary: str, content: str, style: str) -> str:
         try:
@@ -78,10 +80,10 @@ class ImageGenerator:
             }
 
             # 從數據庫獲取內容文件
-            if not news.md_file:
+            if not news.md_file_id:
                 raise Exception("內容文件不存在")
 
-            content = news.md_file.data.decode('utf-8')
+            content = self.context_compressor.get_news_context(db, news)
 
             style = "news illustration style"
             image_prompt = self._generate_image_prompt(news_data['ai_title'], news_data['ai_summary'], content, style)
@@ -99,7 +101,7 @@ class ImageGenerator:
 
                     image_url = response.data[0].url
 
-                    image_response = requests.get(image_url)
+                    image_response = http_client.get(image_url)
                     if image_response.status_code == 200:
                         # 成功下載圖片，保存到數據庫
                         png_content = image_response.content
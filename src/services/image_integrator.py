@@ -5,7 +5,8 @@ from sqlalchemy import create_engine, desc
 from src.config.settings import DATABASE_URL
 from src.database.models import ChosenNews, InstagramPost, News, File
 from src.database.operations import upsert_file, upsert_ig_post_with_png
-from src.utils.file_utils import get_text_width
+from src.utils.file_utils import get_text_width, load_font
+from src.utils.text_measure import get_text_measure
 from src.utils.database_utils import get_latest_chosen_news, get_instagram_posts, get_news_image, get_news_by_id
 import io
 import hashlib
@@ -14,8 +15,8 @@ from zoneinfo import ZoneInfo
 from sqlalchemy.orm import Session
 
 class ImageIntegrator:
-    def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
+    def __init__(self, engine=None):
+        self.engine = engine or create_engine(DATABASE_URL)
         self.title_font_path = "./src/assets/jf-openhuninn-2.0.ttf"
         self.brand_mark_font_path = "./src/assets/Montserrat-SemiBold.ttf"
 
@@ -24,8 +25,8 @@ class ImageIntegrator:
         self.title_font_size = int(56)
 
         # 創建字體對象
-        self.brand_mark_font = ImageFont.truetype(self.brand_mark_font_path, self.brand_mark_font_size)
-        self.title_font = ImageFont.truetype(self.title_font_path, self.title_font_size)
+        self.brand_mark_font = load_font(self.brand_mark_font_path, self.brand_mark_font_size)
+        self.title_font = load_font(self.title_font_path, self.title_font_size)
 
         self.brand_mark = 'GLOBAL NEWS for TAIWAN'
         self.brand_mark_up_margin = 20
@@ -44,7 +45,7 @@ class ImageIntegrator:
         self.title_height = int(self.title_font_size * 2 + self.title_line_space)
 
         self.published_time_font_size = int(30)
-        self.published_time_font = ImageFont.truetype(self.brand_mark_font_path, self.published_time_font_size)
+        self.published_time_font = load_font(self.brand_mark_font_path, self.published_time_font_size)
         self.published_time_right_margin = 28
         self.published_time_bottom_margin = 30
 
@@ -113,14 +114,13 @@ class ImageIntegrator:
 
     def process_title(self):
 
-        def get_first_line_threshold(font, ig_title):
-            # 計算出臨界點，如果超過這個臨界點，就會換行，回傳臨界點的index
-            for i, char in enumerate(ig_title):
-                if get_text_width(font, ig_title[:i]) > self.title_width_for_draw:
-                    return i
-            return len(ig_title)
+        # 計算出臨界點，如果超過這個臨界點，就會換行；以累計寬度二分搜尋，不必逐一量測每個前綴
+        measure = get_text_measure(self.title_font)
+        prefix = measure.prefix_widths(self.ig_title)
+        first_line_threshold = measure.break_index(self.ig_title, self.title_width_for_draw, prefix)
 
-        first_line_threshold = get_first_line_threshold(self.title_font, self.ig_title)
+        def fits_line(start, end):
+            return prefix[end] - prefix[start] <= self.title_width_for_draw
 
         # 定義中文標點符號列表
         punctuation = '，：；。？！-｜'
@@ -140,14 +140,14 @@ class ImageIntegrator:
             first_part = self.ig_title[:split_index + 1]
             second_part = self.ig_title[split_index + 1:]
             
-            if get_text_width(self.title_font, first_part) <= self.title_width_for_draw and get_text_width(self.title_font, second_part) <= self.title_width_for_draw:
+            if fits_line(0, split_index + 1) and fits_line(split_index + 1, len(self.ig_title)):
                 self.first_line = first_part
                 self.second_line = second_part
             # 用第二個標點符號切分，檢查前後兩段是否都小於 17 個字，若都小於則將其切分並放置到第一跟第二行，若只有一段小於則17個字第一行，剩餘第二行
             elif second_split_index != -1:
                 first_part = self.ig_title[:second_split_index + 1]
                 second_part = self.ig_title[second_split_index + 1:]
-                if get_text_width(self.title_font, first_part) <= self.title_width_for_draw and get_text_width(self.title_font, second_part) <= self.title_width_for_draw:
+                if fits_line(0, second_split_index + 1) and fits_line(second_split_index + 1, len(self.ig_title)):
                     self.first_line = first_part
                     self.second_line = second_part
                 else:
@@ -1,39 +1,45 @@
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.orm import joinedload
-from PIL import ImageFont
 import logging
 from src.database.models import News, Media, Feed, ChosenNews, InstagramPost
 from src.services.image_integrator import ImageIntegrator
-from src.utils.file_utils import get_text_width, load_prompt_template
+from src.services.context_compressor import ContextCompressor
+from src.utils.file_utils import get_text_width, load_prompt_template, load_font
 from src.utils.database_utils import get_latest_chosen_news
-from src.config.settings import DATABASE_URL, OPENAI_API_KEY
+from src.utils.openai_client import get_openai_client
+from src.config.settings import DATABASE_URL, OPENAI_API_KEY, POST_GENERATION_MAX_WORKERS, POST_GENERATION_DEADLINE
+from src.database.operations import insert_instagram_posts
 from pydantic import BaseModel
 import unicodedata
 from datetime import datetime
 from typing import List, Dict
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from pydantic import ValidationError
+import openai
 
 class InstagramPostContent(BaseModel):
     ig_title: str
     ig_caption: str
 
 class InstagramPostGenerator:
-    def __init__(self):
+    def __init__(self, engine=None):
         load_dotenv()
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
-        self.engine = create_engine(DATABASE_URL)
+        self.client = get_openai_client()
+        self.engine = engine or create_engine(DATABASE_URL)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
         self.system_prompt = load_prompt_template('instagram_post_prompt.txt')
+        self.context_compressor = ContextCompressor()
         self.title_font_path = "./src/assets/jf-openhuninn-2.0.ttf"
         self.max_regeneration_attempts = 30
         self.title_font_size = int(56)
-        self.title_font = ImageFont.truetype(self.title_font_path, self.title_font_size)
+        self.title_font = load_font(self.title_font_path, self.title_font_size)
         self.title_width_for_draw = 1024 - 40 - 40 - 30
+        self.max_workers = POST_GENERATION_MAX_WORKERS
+        self.deadline = POST_GENERATION_DEADLINE
 
     def process_ig_title_fullwidth(self, text):
             return f.read().strip()
@@ -47,9 +53,18 @@ class InstagramPostGenerator:
             for char in text
         ])
 
-    def generate_instagram_post(self, news: News):
+    def generate_instagram_post(self, news: News, content: str = "", deadline: float = None):
+        """deadline 為 time.monotonic() 的時間點，每次請求的逾時不超過剩餘時間，超過後使用最後一次生成的結果"""
+        result = None
         for attempt in range(self.max_regeneration_attempts):
-            result = self._generate_post_content(news)
+            try:
+                result = self._generate_post_content(news, content, deadline)
+            except (TimeoutError, openai.APITimeoutError):
+                # 重新生成時逾時，沿用上一次的結果；第一次就逾時則這則貼文失敗
+                if result is None:
+                    raise
+                logging.warning(f"新聞 ID {news.id} 已超過 {self.deadline:.0f} 秒的生成期限，停止重新生成")
+                break
             
             if self._is_title_valid(result.ig_title):
                 # 處理 caption，添加媒體來源作為 hashtag
@@ -72,6 +87,9 @@ class InstagramPostGenerator:
                 }
             else:
                 logging.warning(f"第 {attempt + 1} 次嘗試：ig_title: '{result.ig_title}' 寬度超過2行，重新生成")
+                if deadline is not None and time.monotonic() >= deadline:
+                    logging.warning(f"新聞 ID {news.id} 已超過 {self.deadline:.0f} 秒的生成期限，停止重新生成")
+                    break
         
         logging.error(f"無法生成符合寬度要求的 ig_title，使用最後一次生成的結果 '{result.ig_title}'")
         # 對於錯誤情況，我們也應用相同的 caption 處理邏輯
@@ -90,15 +108,19 @@ class InstagramPostGenerator:
             "news": news
         }
 
-    def _generate_post_content(self, news: News):
+    def _generate_post_content(self, news: News, content: str = "", deadline: float = None):
         max_retries = 3
         retry_delay = 2  # 秒
 
         for attempt in range(max_retries):
+            client = self.client
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"新聞 ID {news.id} 的貼文生成已超過期限")
+                # 單次請求的逾時不超過剩餘時間，也不讓 SDK 自行重試
+                client = self.client.with_options(timeout=remaining, max_retries=0)
             try:
-                content = ""
-                if news.md_file:
-                    content = news.md_file.data.decode('utf-8')
                 user_prompt = f"""
                 title: {news.title}
                 summary: {news.summary}
@@ -106,7 +128,7 @@ class InstagramPostGenerator:
                 ai_title: {news.ai_title}
                 ai_summary: {news.ai_summary}
                 """
-                response = self.client.chat.completions.create(
+                response = client.chat.completions.create(
                     model="gpt-4o-2024-08-06",
                     messages=[
                         {"role": "system", "content": self.system_prompt},
@@ -144,30 +166,65 @@ class InstagramPostGenerator:
         if not chosen_news:
             logging.warning("沒有找到最新的已選新聞")
             return []
-        ig_posts = []
-        with self.SessionLocal() as db:
+        # 提交後不讓物件過期，交給工作執行緒時不會再存取資料庫
+        with self.SessionLocal(expire_on_commit=False) as db:
+            # 一次載入所有選中的新聞與其媒體
+            news_by_id = {
+                news.id: news
+                for news in db.query(News).options(joinedload(News.media)).filter(News.id.in_(chosen_news.news_ids))
+            }
+            items = []
             for news_id in chosen_news.news_ids:
-                news = db.query(News).options(joinedload(News.md_file)).filter(News.id == news_id).first()
+                news = news_by_id.get(news_id)
                 if news:
-                    post_content = self.generate_instagram_post(news)
-                    ig_posts.append(post_content)
+                    # 使用快取的壓縮正文，只有快取失效時才讀取 Markdown 文件
+                    items.append((news, self.context_compressor.get_news_context(db, news)))
                 else:
                     logging.warning(f"找不到 ID 為 {news_id} 的新聞")
+            db.expunge_all()
+
+        ig_posts = self._generate_concurrently(items)
         self.save_instagram_posts(ig_posts, chosen_news.id)
         return ig_posts
 
+    def _generate_concurrently(self, items):
+        """並行生成各新聞的貼文，總耗時約為最慢的一則；單則失敗時略過該則"""
+        # 所有貼文共用同一個期限，整批在期限內完成
+        deadline = time.monotonic() + self.deadline
+
+        def generate(item):
+            news, content = item
+            return self.generate_instagram_post(news, content, deadline)
+
+        ig_posts = []
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = [(item[0].id, executor.submit(generate, item)) for item in items]
+            # 依選擇順序收集結果
+            for news_id, future in futures:
+                try:
+                    # 請求逾時已受期限限制，這裡再保留少許寬限，避免單則卡住整批
+                    ig_posts.append(future.result(timeout=max(0, deadline - time.monotonic()) + 5))
+                except FuturesTimeoutError:
+                    logging.error(f"新聞 ID {news_id} 的 Instagram 貼文未在期限內完成，略過")
+                except Exception as e:
+                    logging.error(f"新聞 ID {news_id} 的 Instagram 貼文生成失敗：{str(e)}")
+        finally:
+            # 不等待逾時的工作，尚未開始的也一併取消
+            executor.shutdown(wait=False, cancel_futures=True)
+        return ig_posts
+
     def save_instagram_posts(self, ig_posts: List[Dict], chosen_news_id: int):
         with self.SessionLocal() as db:
-            for post in ig_posts:
-                instagram_post = InstagramPost(
-                    news_id=post['news'].id,
-                    chosen_news_id=chosen_news_id,
-                    ig_title=post['ig_title'],
-                    ig_caption=post['ig_caption']
-                )
-                db.add(instagram_post)
-            
-            db.commit()
+            insert_instagram_posts(db, [
+                {
+                    'news_id': post['news'].id,
+                    'chosen_news_id': chosen_news_id,
+                    'ig_title': post['ig_title'],
+                    'ig_caption': post['ig_caption'],
+                }
+                for post in ig_posts
+            ])
         logging.info(f"已保存 {len(ig_posts)} 條 Instagram 貼文")
 
 def main():
@@ -1,14 +1,15 @@
 from sqlalchemy import create_engine, desc
 from sqlalchemy.orm import sessionmaker
 from src.database.models import InstagramPost, File, ChosenNews, Published, News
-from src.config.settings import DATABASE_URL
-from imgurpython import ImgurClient
-import requests
+from src.database.operations import remove_from_candidate_pool
+from src.config.settings import DATABASE_URL, GRAPH_API_URL
+from src.utils import http_client
+from src.utils.imgur_client import upload_image
+from src.services.published_index import PublishedIndex
 import time
 import os
 import argparse
 from dotenv import load_dotenv
-import tempfile
 import openai
 from pydantic import BaseModel
 from datetime import datetime, timedelta
@@ -20,14 +21,15 @@ from src.utils.database_utils import (
     get_recent_published_instagram_posts
 )
 from src.utils.file_utils import load_prompt_template
+from src.utils.openai_client import get_openai_client
 
 class ChosenInstagramPost(BaseModel):
     id: int
 
 class InstagramPoster:
-    BASE_URL = "https://graph.facebook.com/v20.0"
+    BASE_URL = f"{GRAPH_API_URL}/v20.0"
 
-    def __init__(self):
+    def __init__(self, engine=None):
         load_dotenv()
         self.user_id = os.getenv("INSTAGRAM_ACCOUNT_ID")
         self.access_token = os.getenv("INSTAGRAM_ACCESS_TOKEN")
@@ -35,11 +37,12 @@ class InstagramPoster:
         self.imgur_client_secret = os.getenv("IMGUR_CLIENT_SECRET")
         if not self.user_id or not self.access_token or not self.imgur_client_id or not self.imgur_client_secret:
             raise ValueError("請確保在 .env 檔案中設置了所有必要的環境變量")
-        self.engine = create_engine(DATABASE_URL)
+        self.engine = engine or create_engine(DATABASE_URL)
         self.SessionLocal = sessionmaker(bind=self.engine)
-        self.imgur_client = ImgurClient(self.imgur_client_id, self.imgur_client_secret)
         self.prompt_template = load_prompt_template('choose_instagram_post_prompt.txt')
+        self.published_index = PublishedIndex()
         self.env = os.getenv("ENV", "development")
+        self.client = get_openai_client()
 
     def select_instagram_post(self, instagram_posts):
         if not instagram_posts:
@@ -62,11 +65,10 @@ class InstagramPoster:
         )
 
         try:
-            client = openai.OpenAI()
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    response = client.chat.completions.create(
+                    response = self.client.chat.completions.create(
                         model="gpt-4o-2024-08-06",
                         temperature=0,
                         messages=[
@@ -120,16 +122,10 @@ class InstagramPoster:
     def upload_image_to_imgur(self, image_data: bytes) -> str:
         try:
             print("開始上傳圖片到 Imgur")
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as temp_file:
-                temp_file.write(image_data)
-                temp_file_path = temp_file.name
+            image_url = upload_image(image_data, self.imgur_client_id)
 
-            uploaded_image = self.imgur_client.upload_from_path(temp_file_path, anon=True)
-
-            os.unlink(temp_file_path)
-
-            print(f"Imgur 上傳成功。返回的數據: {uploaded_image['link']}")
-            return uploaded_image['link']
+            print(f"Imgur 上傳成功。返回的數據: {image_url}")
+            return image_url
         except Exception as e:
             print(f"上傳圖片到 Imgur 時發生錯誤: {e}")
             raise
@@ -143,7 +139,7 @@ class InstagramPoster:
         }
 
         if self.env == 'production':
-            response = requests.post(url, data=payload)
+            response = http_client.post(url, data=payload)
             if response.status_code == 200:
                 return response.json()['id']
             else:
@@ -161,7 +157,7 @@ class InstagramPoster:
         }
 
         if self.env == 'production':
-            response = requests.post(url, data=payload)
+            response = http_client.post(url, data=payload)
             if response.status_code == 200:
                 print("媒體發布成功！")
             else:
@@ -181,7 +177,7 @@ class InstagramPoster:
                 if not file:
                     raise ValueError(f"找不到 Instagram 貼文 ID {post_id} 的整合圖片")
 
-                image_data = file.data
+                image_data = file.content
                 caption = post.ig_caption
 
             image_url = self.upload_image_to_imgur(image_data)
@@ -213,6 +209,9 @@ class InstagramPoster:
             )
             session.add(published)
             session.commit()
+            # 加入已發布貼文的相似度索引，之後選擇新聞時在本地過濾重複的報導
+            self.published_index.record(session, instagram_post)
+            remove_from_candidate_pool(session, [instagram_post.news_id])
             print(f"已記錄發布的貼文：News ID {instagram_post.news_id}, Instagram Post ID {instagram_post_id}")
 
     def auto_post(self):
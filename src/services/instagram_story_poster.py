@@ -1,18 +1,17 @@
 from sqlalchemy import create_engine, desc, func
 from sqlalchemy.orm import sessionmaker
 from src.database.models import Story, File, Published, News
-from src.config.settings import DATABASE_URL
-from imgurpython import ImgurClient
-import requests
+from src.config.settings import DATABASE_URL, GRAPH_API_URL
+from src.utils import http_client
+from src.utils.imgur_client import upload_image
 import time
 import os
 import argparse
 from dotenv import load_dotenv
-import tempfile
 from datetime import timedelta
 
 class InstagramStoryPoster:
-    BASE_URL = "https://graph.facebook.com/v20.0"
+    BASE_URL = f"{GRAPH_API_URL}/v20.0"
 
     def __init__(self):
         load_dotenv()
@@ -24,23 +23,16 @@ class InstagramStoryPoster:
             raise ValueError("請確保在 .env 檔案中設置了所有必要的環境變量")
         self.engine = create_engine(DATABASE_URL)
         self.SessionLocal = sessionmaker(bind=self.engine)
-        self.imgur_client = ImgurClient(self.imgur_client_id, self.imgur_client_secret)
         self.env = os.getenv("ENV", "development")
         # self.env = "production"
 
     def upload_image_to_imgur(self, image_data: bytes) -> str:
         try:
             print("開始上傳圖片到 Imgur")
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as temp_file:
-                temp_file.write(image_data)
-                temp_file_path = temp_file.name
+            image_url = upload_image(image_data, self.imgur_client_id)
 
-            uploaded_image = self.imgur_client.upload_from_path(temp_file_path, anon=True)
-            
-            os.unlink(temp_file_path)
-
-            print(f"Imgur 上傳成功。返回的連結: {uploaded_image['link']}")
-            return uploaded_image['link']
+            print(f"Imgur 上傳成功。返回的連結: {image_url}")
+            return image_url
         except Exception as e:
             print(f"上傳圖片到 Imgur 時發生錯誤: {e}")
             raise
@@ -54,7 +46,7 @@ class InstagramStoryPoster:
         }
 
         if self.env == 'production':
-            response = requests.post(url, data=payload)
+            response = http_client.post(url, data=payload)
             if response.status_code == 200:
                 return response.json()['id']
             else:
@@ -73,7 +65,7 @@ class InstagramStoryPoster:
         }
 
         if self.env == 'production':
-            response = requests.post(url, data=payload)
+            response = http_client.post(url, data=payload)
             if response.status_code == 200:
                 return response.json()['id']
             else:
@@ -91,7 +83,7 @@ class InstagramStoryPoster:
         }
         
         if self.env == 'production':
-            response = requests.post(url, data=payload)
+            response = http_client.post(url, data=payload)
             if response.status_code == 200:
                 print("限時動態發布成功！")
             else:
@@ -111,7 +103,7 @@ class InstagramStoryPoster:
                 if not file:
                     raise ValueError(f"找不到限時動態 ID {story_id} 的圖片")
                 
-                image_data = file.data
+                image_data = file.content
 
             image_url = self.upload_image_to_imgur(image_data)
             
@@ -1,17 +1,31 @@
 from typing import List
-import openai
 from pydantic import BaseModel
 from sqlalchemy import create_engine, func
 from sqlalchemy.orm import sessionmaker
-from src.config.settings import DATABASE_URL, OPENAI_API_KEY
+from src.config.settings import (
+    DATABASE_URL,
+    OPENAI_API_KEY,
+    NEWS_RANKING_ENABLED,
+    NEWS_RANKING_AUDIT_RATE,
+    NEWS_SELECTION_CHUNK_SIZE,
+    NEWS_SELECTION_WINNERS_PER_CHUNK,
+    NEWS_SELECTION_MAX_WORKERS,
+    CANDIDATE_POOL_WINDOW_HOURS,
+)
 from src.database.models import News, Media, Feed, File, ChosenNews
+from src.database.operations import iter_candidate_news, expire_candidate_pool
+from src.services.news_ranker import NewsRanker
+from src.services.published_index import PublishedIndex
 import os
 import logging
+import math
+import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 import csv
 from datetime import datetime
-from src.utils.database_utils import get_recent_published_instagram_posts, get_published_news_ids, get_news_by_id
 from src.utils.file_utils import load_prompt_template
+from src.utils.openai_client import get_openai_client
 
 # 設置日誌
 logging.basicConfig(level=logging.INFO)
@@ -25,48 +39,76 @@ class ChosenNewsItem(BaseModel):
 class ChosenNewsParameters(BaseModel):
     chosen_news: List[ChosenNewsItem]
 
+# 候選新聞中放入提示的欄位，其餘欄位只供本地排序使用
+PROMPT_FIELDS = ('id', 'title', 'summary', 'ai_title', 'ai_summary')
+
+def prompt_news(news_list):
+    return [{field: news[field] for field in PROMPT_FIELDS} for news in news_list]
+
 class NewsChooser:
-    def __init__(self, num_chosen):
+    def __init__(self, num_chosen, engine=None):
         self.num_chosen = num_chosen
-        self.engine = create_engine(DATABASE_URL)
+        self.engine = engine or create_engine(DATABASE_URL)
+        self.client = get_openai_client()
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
         self.prompt_template = load_prompt_template('choose_news_prompt.txt')
-        self.filter_prompt_template = load_prompt_template('filter_published_news_prompt.txt')
+        self.published_index = PublishedIndex()
+        self.ranker = NewsRanker() if NEWS_RANKING_ENABLED else None
+        self.audit_rate = NEWS_RANKING_AUDIT_RATE
+        self.chunk_size = max(2, NEWS_SELECTION_CHUNK_SIZE)
+        # 每組至少選出最終數量，讓決選時同一組的新聞也能全部入選
+        self.winners_per_chunk = NEWS_SELECTION_WINNERS_PER_CHUNK or num_chosen
+        self.max_workers = NEWS_SELECTION_MAX_WORKERS
 
     def load_news(self):
+        """逐批讀出候選池中範圍內未發布的新聞（生成器），每則為只含選擇與排序所需欄位的 dict"""
         now = datetime.now()
-        six_hours_ago = now - timedelta(hours=6)
+        since = now - timedelta(hours=CANDIDATE_POOL_WINDOW_HOURS)
         with self.SessionLocal() as session:
-            query = session.query(News).filter(
-                News.published_at.between(six_hours_ago, now)
-            ).order_by(News.published_at.desc())
-            return query.all()
+            # 候選池在擷取、摘要與發布時已更新，這裡只需移除過期的新聞
+            expire_candidate_pool(session, since)
+            yield from iter_candidate_news(session, since, now)
 
     def choose_important_news(self, news_list):
+        """候選超過 chunk_size 時分組並行選擇，再從各組勝出的新聞中決選，耗時為一組加上一次決選"""
+        if len(news_list) > self.chunk_size:
+            news_list = self._select_from_chunks(news_list)
+            logger.info(f"分組選擇後剩下 {len(news_list)} 條新聞進入決選")
+        return self._select(news_list, self.num_chosen)
+
+    def _select_from_chunks(self, news_list):
+        num_chunks = math.ceil(len(news_list) / self.chunk_size)
+        # 各組勝出的新聞合計不超過一組的大小，決選一次即可完成；但至少足夠選出最終數量
+        winners = max(min(self.winners_per_chunk, self.chunk_size // num_chunks),
+                      math.ceil(self.num_chosen / num_chunks))
+        # 依排序名次輪流分配，各組的候選品質相近
+        chunks = [news_list[index::num_chunks] for index in range(num_chunks)]
+
+        def select_chunk(chunk):
+            by_id = {news['id']: news for news in chunk}
+            # 模型多選時只取前 winners 條，避免決選的候選超出一組
+            selected = [by_id[item.id] for item in self._select(chunk, winners) if item.id in by_id][:winners]
+            if not selected:
+                # 該組選擇失敗時保留排序在前的候選，不讓整輪中斷
+                logger.warning(f"分組選擇沒有結果，改用排序前 {winners} 條新聞")
+                selected = chunk[:winners]
+            return selected
+
+        # 預設所有組同時選擇，耗時不隨組數增加
+        with ThreadPoolExecutor(max_workers=self.max_workers or num_chunks) as executor:
+            return [news for selected in executor.map(select_chunk, chunks) for news in selected]
+
+    def _select(self, news_list, n):
         total_news = len(news_list)
-        news_data = []
-
-        for news_item in news_list:
-            news = get_news_by_id(news_item.id)
-            if news:
-                news_data.append({
-                    "id": news.id,
-                    "title": news.title,
-                    "summary": news.summary,
-                    "ai_title": news.ai_title,
-                    "ai_summary": news.ai_summary
-                })
 
         prompt = self.prompt_template.format(
-            n=self.num_chosen, 
-            news_list=news_data, 
+            n=n, 
+            news_list=prompt_news(news_list), 
             total_news=total_news
         )
 
-        client = openai.OpenAI()
-
         try:
-            response = client.chat.completions.create(
+            response = self.client.chat.completions.create(
                 model="gpt-4o-2024-08-06",
                 temperature=0,
                 messages=[
@@ -96,83 +138,40 @@ class NewsChooser:
             logger.error(f"Error in AI selection: {str(e)}")
             return []
 
-    def filter_unpublished_news(self, news_list):
-        published_news_ids = get_published_news_ids()
-        recent_published_ig_posts = get_recent_published_instagram_posts()
-
-        with self.SessionLocal() as session:
-            unpublished_news = [news for news in news_list if news.id not in published_news_ids]
-
-            if not unpublished_news:
-                logger.warning("所有新聞都已發布")
-                return []
+    def filter_unpublished_news(self, news_iter):
+        """逐筆讀取候選並過濾，回傳（保留的新聞, 讀取的候選數）；被過濾的新聞不會留在記憶體中"""
+        # 已發布的新聞在 load_news 查詢時已排除，這裡以本地相似度索引過濾與近期貼文重複的報導
+        total = 0
 
-            total_news = len(unpublished_news)
-            news_data = []
-
-            for news in unpublished_news:
-                news_data.append({
-                    "id": news.id,
-                    "title": news.title,
-                    "summary": news.summary,
-                    "ai_title": news.ai_title,
-                    "ai_summary": news.ai_summary
-                })
-
-        # AI 過濾邏輯保持不變
-        prompt = self.filter_prompt_template.format(
-            news_list=news_data,
-            total_news=total_news,
-            recent_published_ig_posts=recent_published_ig_posts
-        )
-
-        client = openai.OpenAI()
-
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o-2024-08-06",
-                temperature=0,
-                messages=[
-                    {"role": "system", "content": "You are a professional news editor skilled at filtering out published news."},
-                    {"role": "user", "content": prompt}
-                ],
-                tools=[{
-                    "type": "function",
-                    "function": {
-                        "name": "output_unpublished_news",
-                        "description": "Filter out published news from the original list, keeping the original IDs.",
-                        "parameters": ChosenNewsParameters.model_json_schema()
-                    }
-                }]
-            )
+        def counted():
+            nonlocal total
+            for news in news_iter:
+                total += 1
+                yield news
 
-            tool_call = response.choices[0].message.tool_calls[0]
-            if tool_call.function.name == "output_unpublished_news":
-                unpublished_news = ChosenNewsParameters.model_validate_json(tool_call.function.arguments).chosen_news
-                logger.info(f"AI 從 {len(news_data)} 條新聞中識別出 {len(unpublished_news)} 條未發布的新聞")
-                return unpublished_news
-            else:
-                logger.error("意外的函數調用")
-                return []
-        except Exception as e:
-            logger.error(f"AI 過濾過程中出錯：{str(e)}")
-            return []
+        with self.SessionLocal() as session:
+            kept = self.published_index.filter(session, counted())
+        if not total:
+            logger.warning("所有新聞都已發布")
+        return kept, total
 
-    def save_chosen_news_to_database(self, chosen_news):
+    def save_chosen_news_to_database(self, chosen_news, candidate_count=None, shortlist_ids=None, audit_news_ids=None):
         with self.SessionLocal() as session:
             news_ids = [item.id for item in chosen_news]
-            chosen_news_entry = ChosenNews(news_ids=news_ids)
+            chosen_news_entry = ChosenNews(news_ids=news_ids, candidate_count=candidate_count,
+                                           shortlist_ids=shortlist_ids, audit_news_ids=audit_news_ids)
             session.add(chosen_news_entry)
             session.commit()
             logger.info(f"已將選擇的新聞保存到數據庫，ID: {chosen_news_entry.id}")
 
     def run(self):
-        news_list = self.load_news()
-        total_news = len(news_list)
-        logger.info(f"載入了 {total_news} 條過去 6 小時內發布的新聞")
+        # 已發布報導的過濾在本地進行，邊讀取候選池邊套用在全部候選上，讓抽查與候選清單比較的是同一批新聞；
+        # 排序需要整批候選的 TF-IDF 統計，過濾後的候選仍會全部載入
+        unpublished_pool, total_news = self.filter_unpublished_news(self.load_news())
+        logger.info(f"載入了 {total_news} 條過去 {CANDIDATE_POOL_WINDOW_HOURS} 小時內發布且尚未發布為貼文的新聞")
+        # 再於本地排序，只把前段的候選送入 LLM 選擇
+        unpublished_news = self.ranker.shortlist(unpublished_pool) if self.ranker else unpublished_pool
 
-        unpublished_news = self.filter_unpublished_news(news_list)
-        
         if not unpublished_news:
             logger.warning("沒有未發布的新聞")
             print(f"從 {total_news} 條新聞中沒有找到未發布的新聞")
@@ -186,7 +185,13 @@ class NewsChooser:
                 print(f"ID: {item.id}, 標題: {item.title}")
             print(f"\n總共從 {len(unpublished_news)} 條未發布的新聞中選出了 {len(chosen_news)} 條重要新聞")
 
-            self.save_chosen_news_to_database(chosen_news)
+            ranking = {}
+            if self.ranker:
+                ranking = {'candidate_count': total_news, 'shortlist_ids': [news['id'] for news in unpublished_news]}
+                # 抽查：讓 LLM 從過濾後的全部候選中再選一次，統計候選清單是否涵蓋其選擇
+                if len(unpublished_pool) > len(unpublished_news) and random.random() < self.audit_rate:
+                    ranking['audit_news_ids'] = [item.id for item in self.choose_important_news(unpublished_pool)]
+            self.save_chosen_news_to_database(chosen_news, **ranking)
         else:
             logger.warning("沒有選出任何新聞")
             print(f"從 {len(unpublished_news)} 條未發布的新聞中沒有選出任何重要新聞")
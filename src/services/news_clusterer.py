@@ -0,0 +1,91 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from src.config.settings import NEWS_CLUSTERING_THRESHOLD, NEWS_CLUSTERING_WINDOW_HOURS
+from src.database.operations import get_cluster_representatives
+from src.utils.text_hashing import MinHashIndex, jaccard, minhash
+
+logger = logging.getLogger(__name__)
+
+class NewsClusterer:
+    """以標題與 RSS 摘要的 MinHash 將不同媒體報導的同一則新聞歸為一群，每群以最早發布的一篇為代表"""
+
+    def __init__(self, threshold: float = NEWS_CLUSTERING_THRESHOLD,
+                 window_hours: int = NEWS_CLUSTERING_WINDOW_HOURS):
+        self.threshold = threshold
+        self.window_hours = window_hours
+
+    @staticmethod
+    def fingerprint(title: str, summary: str) -> List[int]:
+        # 沒有摘要的 Feed 會填入固定文字，不列入比對
+        if summary == 'No summary available':
+            summary = ''
+        signature, _ = minhash(f"{title}\n{summary or ''}")
+        return signature or None
+
+    def assign(self, db: Session, news_items: Dict[str, dict]) -> Dict[str, str]:
+        """news_items 為 {link: news_data}，news_data 需含 minhash；回傳重複新聞與其代表的連結 {link: representative_link}"""
+        index = MinHashIndex(self.threshold)
+        since = datetime.now(timezone.utc) - timedelta(hours=self.window_hours)
+        for link, signature in get_cluster_representatives(db, since):
+            index.add(link, signature)
+        stored = len(index)
+
+        clusters = {}
+        # 依發布時間排序，讓最早報導的一篇成為代表
+        for link, news_data in sorted(news_items.items(), key=lambda item: item[1]['published_at']):
+            signature = news_data.get('minhash')
+            if not signature:
+                continue
+            representative = index.nearest(signature)
+            if representative is None:
+                index.add(link, signature)
+            else:
+                clusters[link] = representative
+
+        logger.info(f"分群完成：{len(news_items)} 篇新聞中有 {len(clusters)} 篇與既有報導重複（比對 {stored} 篇近期新聞）")
+        return clusters
+
+def calibrate(pairs: List[dict], thresholds: List[float]) -> List[dict]:
+    """pairs 為 [{'same': bool, 'a': {title, summary}, 'b': {title, summary}}]，回傳各門檻的召回率與誤判率"""
+    scores = [
+        (pair['same'], jaccard(NewsClusterer.fingerprint(pair['a']['title'], pair['a']['summary']),
+                               NewsClusterer.fingerprint(pair['b']['title'], pair['b']['summary'])))
+        for pair in pairs
+    ]
+    same = [score for is_same, score in scores if is_same]
+    different = [score for is_same, score in scores if not is_same]
+    return [
+        {
+            'threshold': threshold,
+            'recall': sum(score >= threshold for score in same) / len(same) if same else 0.0,
+            'false_positive_rate': sum(score >= threshold for score in different) / len(different) if different else 0.0,
+        }
+        for threshold in thresholds
+    ]
+
+def main():
+    import argparse
+    import json
+    import os
+
+    default_pairs = os.path.join(os.path.dirname(__file__), 'fixtures', 'pairs', 'story_pairs.json')
+    parser = argparse.ArgumentParser(description="新聞分群工具")
+    parser.add_argument('action', choices=['calibrate'], help="選擇操作：calibrate（以標註的新聞配對評估分群門檻）")
+    parser.add_argument('--pairs', default=default_pairs, help='標註的新聞配對 JSON，預設使用 fixtures/pairs/story_pairs.json')
+    parser.add_argument('--thresholds', type=float, nargs='+',
+                        default=[0.1, 0.12, 0.14, 0.16, 0.18, 0.2, 0.22, 0.25, 0.3], help='要評估的 Jaccard 門檻')
+    args = parser.parse_args()
+
+    with open(args.pairs, encoding='utf-8') as f:
+        pairs = json.load(f)
+    same = sum(1 for pair in pairs if pair['same'])
+    print(f"{len(pairs)} 組配對（同一則新聞 {same} 組，不同新聞 {len(pairs) - same} 組），目前門檻 {NEWS_CLUSTERING_THRESHOLD}")
+    for row in calibrate(pairs, args.thresholds):
+        print(f"門檻 {row['threshold']:.2f}：召回率 {row['recall']:.0%}，誤判率 {row['false_positive_rate']:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import logging
+import math
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.config.settings import (
+    DATABASE_URL,
+    NEWS_RANKING_SHORTLIST_SIZE,
+    NEWS_RANKING_WEIGHTS,
+    NEWS_RANKING_KEYWORDS,
+    NEWS_RANKING_SOURCE_WEIGHTS,
+)
+from src.database.operations import iter_candidate_news, get_ranked_chosen_news
+from src.utils.text_hashing import tokenize
+
+logger = logging.getLogger(__name__)
+
+class NewsRanker:
+    """以本地特徵為候選新聞評分，只保留前 shortlist_size 篇送入 LLM 選擇"""
+
+    def __init__(self, shortlist_size: int = NEWS_RANKING_SHORTLIST_SIZE,
+                 weights: Dict[str, float] = None, keywords: Dict[str, float] = None,
+                 source_weights: Dict[str, float] = None):
+        self.shortlist_size = shortlist_size
+        self.weights = NEWS_RANKING_WEIGHTS if weights is None else weights
+        self.source_weights = NEWS_RANKING_SOURCE_WEIGHTS if source_weights is None else source_weights
+        keywords = NEWS_RANKING_KEYWORDS if keywords is None else keywords
+        # 關鍵字與新聞內容以相同方式切詞，比對完整字詞，避免 ai 命中 said
+        self.keywords = {f" {' '.join(tokenize(keyword))} ": weight for keyword, weight in keywords.items() if tokenize(keyword)}
+
+    @staticmethod
+    def _text(news: dict) -> str:
+        # 尚未摘要的新聞改用 RSS 標題與摘要
+        return f"{news.get('ai_title') or news['title']}\n{news.get('ai_summary') or news.get('summary') or ''}"
+
+    def _centrality(self, documents: List[List[str]]) -> List[float]:
+        """各篇 TF-IDF 向量與所有候選平均向量的餘弦相似度，越高代表主題越多媒體關注"""
+        document_frequency = Counter(term for tokens in documents for term in set(tokens))
+        total = len(documents)
+        vectors = []
+        for tokens in documents:
+            counts = Counter(tokens)
+            vector = {term: (1 + math.log(count)) * (math.log((1 + total) / (1 + document_frequency[term])) + 1)
+                      for term, count in counts.items()}
+            norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+            vectors.append({term: value / norm for term, value in vector.items()})
+
+        centroid = Counter()
+        for vector in vectors:
+            centroid.update(vector)
+        centroid_norm = math.sqrt(sum(value * value for value in centroid.values())) or 1.0
+        return [sum(value * centroid[term] for term, value in vector.items()) / centroid_norm for vector in vectors]
+
+    def score(self, news_list: List[dict]) -> List[float]:
+        documents = [tokenize(self._text(news)) for news in news_list]
+        centrality = self._centrality(documents) if news_list else []
+        scores = []
+        for news, tokens, central in zip(news_list, documents, centrality):
+            text = f" {' '.join(tokens)} "
+            features = {
+                'centrality': central,
+                'coverage': math.log1p(news.get('duplicates') or 0),
+                'keywords': sum(weight for keyword, weight in self.keywords.items() if keyword in text),
+                'source': self.source_weights.get(news.get('media'), 0.0),
+                'summary': 1.0 if news.get('ai_summary') else 0.0,
+            }
+            scores.append(sum(self.weights.get(name, 0.0) * value for name, value in features.items()))
+        return scores
+
+    def rank(self, news_list: List[dict]) -> List[dict]:
+        """依分數由高到低排序，同分時較新的新聞在前（news_list 已依發布時間排序）"""
+        scores = self.score(news_list)
+        order = sorted(range(len(news_list)), key=lambda index: -scores[index])
+        return [dict(news_list[index], score=scores[index]) for index in order]
+
+    def shortlist(self, news_list: List[dict]) -> List[dict]:
+        ranked = self.rank(news_list)[:self.shortlist_size]
+        logger.info(f"本地排序：從 {len(news_list)} 篇候選新聞中保留前 {len(ranked)} 篇送入 LLM")
+        return ranked
+
+def shortlist_metrics(rows: list) -> dict:
+    """rows 為 get_ranked_chosen_news 的結果，統計選中新聞在候選清單中的名次與抽查時的涵蓋率"""
+    runs = len(rows)
+    ranks = []
+    audited_runs = 0
+    audited_picks = 0
+    audited_hits = 0
+    for row in rows:
+        positions = {news_id: index for index, news_id in enumerate(row.shortlist_ids)}
+        ranks.extend((positions[news_id], len(row.shortlist_ids)) for news_id in row.news_ids if news_id in positions)
+        if row.audit_news_ids is not None:
+            audited_runs += 1
+            audited_picks += len(row.audit_news_ids)
+            audited_hits += sum(1 for news_id in row.audit_news_ids if news_id in positions)
+
+    return {
+        'runs': runs,
+        'avg_candidates': sum(row.candidate_count for row in rows) / runs if runs else 0.0,
+        'avg_shortlist': sum(len(row.shortlist_ids) for row in rows) / runs if runs else 0.0,
+        'picks': len(ranks),
+        'mean_rank': sum(rank for rank, _ in ranks) / len(ranks) + 1 if ranks else 0.0,
+        # 選中的新聞落在候選清單前半段的比例，過低代表評分與 LLM 的判斷不一致
+        'top_half_share': sum(1 for rank, size in ranks if rank < size / 2) / len(ranks) if ranks else 0.0,
+        'audited_runs': audited_runs,
+        # 從全部候選中選出的新聞有多少落在候選清單內
+        'audit_recall': audited_hits / audited_picks if audited_picks else None,
+    }
+
+def main():
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="檢視選擇新聞前的本地排序")
+    parser.add_argument('action', choices=['preview', 'metrics'],
+                        help="選擇操作：preview（列出目前候選新聞的排序）或 metrics（統計最終選擇落在候選清單內的比例）")
+    parser.add_argument('--hours', type=int, default=6, help='preview 的候選時間範圍（小時）')
+    parser.add_argument('--days', type=int, default=30, help='metrics 統計的天數')
+    parser.add_argument('--limit', type=int, default=NEWS_RANKING_SHORTLIST_SIZE, help='preview 列出的篇數')
+    args = parser.parse_args()
+
+    SessionLocal = sessionmaker(bind=create_engine(DATABASE_URL))
+    with SessionLocal() as db:
+        if args.action == 'preview':
+            now = datetime.now()
+            news_list = list(iter_candidate_news(db, now - timedelta(hours=args.hours), now))
+            for index, news in enumerate(NewsRanker().rank(news_list)[:args.limit], 1):
+                print(f"{index:3d}. [{news['score']:.3f}] ID {news['id']} {news['media'] or ''}：{news['ai_title'] or news['title']}")
+            print(f"\n共 {len(news_list)} 篇候選新聞")
+        elif args.action == 'metrics':
+            metrics = shortlist_metrics(get_ranked_chosen_news(db, datetime.now() - timedelta(days=args.days)))
+            print(f"過去 {args.days} 天共 {metrics['runs']} 次選擇，平均 {metrics['avg_candidates']:.1f} 篇候選、"
+                  f"{metrics['avg_shortlist']:.1f} 篇送入 LLM")
+            print(f"選中 {metrics['picks']} 篇，平均名次 {metrics['mean_rank']:.1f}，"
+                  f"落在候選清單前半段的比例 {metrics['top_half_share']:.1%}")
+            if metrics['audit_recall'] is None:
+                print("沒有抽查紀錄（設定 news_ranking.audit_rate 以啟用）")
+            else:
+                print(f"抽查 {metrics['audited_runs']} 次，從全部候選中選出的新聞有 {metrics['audit_recall']:.1%} 落在候選清單內")
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,82 @@
-from openai import OpenAI
-from src.config.settings import OPENAI_API_KEY
+from src.config.settings import OPENAI_API_KEY, BATCH_SUMMARY_MODEL
 from src.utils.file_utils import load_prompt_template
+from src.utils.openai_client import get_openai_client
+from src.database.operations import update_news_summaries
+from sqlalchemy.orm import Session
 import os
+import hashlib
+import json
 from pydantic import BaseModel
+from typing import Optional
 import openai
 
+DEFAULT_MODEL = 'gpt-4o-mini'
+# 同步摘要與批次摘要設定的模型產生的摘要都視為有效，不因寫入路徑不同而重新摘要
+SUMMARY_MODELS = frozenset({DEFAULT_MODEL, BATCH_SUMMARY_MODEL})
+# summarize_content 失敗時回傳的標題，不應視為有效摘要
+SUMMARY_FAILED_TITLE = "摘要生成失敗"
+
 class News(BaseModel):
     ai_title: str
     ai_summary: str
 
 class NewsSummarizer:
     def __init__(self, api_key: str = OPENAI_API_KEY):
-        self.client = OpenAI(api_key=api_key)
+        self.client = get_openai_client(api_key)
         self.system_prompt = load_prompt_template('summarize_prompt.txt')
+        # 提示或輸出格式變更時版本隨之改變，已摘要的新聞需要重新產生
+        self.prompt_version = hashlib.sha256(
+            (self.system_prompt + json.dumps(News.model_json_schema(), sort_keys=True)).encode('utf-8')
+        ).hexdigest()[:16]
+
+    @staticmethod
+    def input_hash(title: str, content: str) -> str:
+        return hashlib.sha256(f"{title}\n{content}".encode('utf-8')).hexdigest()
+
+    def needs_summary(self, state: dict, title: str, content: str, models: frozenset = SUMMARY_MODELS) -> bool:
+        """state 為 get_news_summary_states 回傳的單筆資料，輸入、提示與模型皆未變更時不需重新摘要"""
+        return not (
+            state.get('ai_summary')
+            and state.get('summary_input_hash') == self.input_hash(title, content)
+            and state.get('summary_prompt_version') == self.prompt_version
+            and state.get('summary_model') in models
+        )
+
+    def build_request_body(self, title: str, content: str, model: str = DEFAULT_MODEL) -> dict:
+        # 同步呼叫與批次任務共用相同的提示與工具定義
+        return {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": f"title: {title}, content: {content}"}
+            ],
+            "tools": [
+                {
+                    "type": "function",
+                    "function": {
+                        "name": "output_title_and_summary",
+                        "description": "Generate a title and summary for the news.",
+                        "parameters": News.model_json_schema()
+                    }
+                }
+            ]
+        }
 
-    def summarize_content(self, title: str, content: str, model: str = 'gpt-4o-mini') -> tuple[str, str, str]:
+    @staticmethod
+    def parse_tool_call(name: str, arguments: str) -> Optional[News]:
+        if name != "output_title_and_summary":
+            return None
+        return News.model_validate_json(arguments)
+
+    def summarize_content(self, title: str, content: str, model: str = DEFAULT_MODEL) -> tuple[str, str, str]:
         max_attempts = 3
         for attempt in range(max_attempts):
             try:
-                response = self.client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": self.system_prompt},
-                        {"role": "user", "content": f"title: {title}, content: {content}"}
-                    ],
-                    tools=[
-                        {
-                            "type": "function",
-                            "function": {
-                                "name": "output_title_and_summary",
-                                "description": "Generate a title and summary for the news.",
-                                "parameters": News.model_json_schema()
-                            }
-                        }
-                    ]
-                )
+                response = self.client.chat.completions.create(**self.build_request_body(title, content, model))
                 
                 tool_calls = response.choices[0].message.tool_calls
-                if tool_calls and tool_calls[0].function.name == "output_title_and_summary":
-                    result = News.model_validate_json(tool_calls[0].function.arguments)
+                result = self.parse_tool_call(tool_calls[0].function.name, tool_calls[0].function.arguments) if tool_calls else None
+                if result:
                     return result.ai_title, result.ai_summary, model
                 else:
                     if attempt < max_attempts - 1:
@@ -49,10 +87,28 @@ class NewsSummarizer:
 
             except FileNotFoundError as e:
                 print(f"錯誤：{e}")
-                return "摘要生成失敗", "無法找到提示文件", model
+                return SUMMARY_FAILED_TITLE, "無法找到提示文件", model
             except Exception as e:
                 print(f"摘要內容時發生錯誤：{e}")
-                return "摘要生成失敗", f"處理過程中發生錯誤: {str(e)}", model
+                return SUMMARY_FAILED_TITLE, f"處理過程中發生錯誤: {str(e)}", model
 
         # 如果所有嘗試都失敗
-        return "摘要生成失敗", "連續三次未收到預期的工具調用回應", model
\ No newline at end of file
+        return SUMMARY_FAILED_TITLE, "連續三次未收到預期的工具調用回應", model
+
+    def summarize_values(self, title: str, content: str, model: str = DEFAULT_MODEL) -> dict:
+        """呼叫模型產生摘要，回傳可直接寫入 news 的欄位；不存取資料庫，可在工作執行緒中執行"""
+        ai_title, ai_summary, model = self.summarize_content(title, content, model)
+        succeeded = ai_title != SUMMARY_FAILED_TITLE
+        # 失敗時不記錄輸入雜湊，下次重新摘要時會再嘗試
+        return {
+            'ai_title': ai_title,
+            'ai_summary': ai_summary,
+            'summary_input_hash': self.input_hash(title, content) if succeeded else None,
+            'summary_prompt_version': self.prompt_version if succeeded else None,
+            'summary_model': model,
+        }
+
+    def summarize_and_save(self, db: Session, news_id: int, title: str, content: str, model: str = DEFAULT_MODEL) -> bool:
+        values = self.summarize_values(title, content, model)
+        update_news_summaries(db, {news_id: values})
+        return values['summary_input_hash'] is not None
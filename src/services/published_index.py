@@ -0,0 +1,221 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Iterable, List, Set
+
+from pydantic import BaseModel
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, Session, joinedload
+
+from src.config.settings import (
+    DATABASE_URL,
+    PUBLISHED_FILTER_WINDOW_HOURS,
+    PUBLISHED_FILTER_THRESHOLD,
+    PUBLISHED_FILTER_REVIEW_THRESHOLD,
+)
+from src.database.models import InstagramPost, Published
+from src.database.operations import upsert_published_sketch, get_recent_published_sketches
+from src.utils.file_utils import load_prompt_template
+from src.utils.openai_client import get_openai_client
+from src.utils.text_hashing import minhash_by_script, jaccard
+
+logger = logging.getLogger(__name__)
+
+# 貼文說明開頭的來源標記，每篇都有，不列入比對
+SOURCE_PREFIX = '新聞來源：'
+
+class UnpublishedNewsItem(BaseModel):
+    id: int
+    title: str
+
+class UnpublishedNewsParameters(BaseModel):
+    unpublished_news: List[UnpublishedNewsItem]
+
+class PublishedIndex:
+    """已發布貼文的 MinHash 索引，用來在本地過濾與近期貼文重複的候選新聞
+
+    相似度不低於 threshold 的候選直接略過；介於 review_threshold 與 threshold 之間的候選
+    無法單靠字詞判斷（同一則新聞的不同改寫與同主題的不同新聞分數相近），整批交由 LLM 判斷。
+    """
+
+    def __init__(self, window_hours: int = PUBLISHED_FILTER_WINDOW_HOURS,
+                 threshold: float = PUBLISHED_FILTER_THRESHOLD,
+                 review_threshold: float = PUBLISHED_FILTER_REVIEW_THRESHOLD):
+        self.window_hours = window_hours
+        self.threshold = threshold
+        self.review_threshold = review_threshold
+
+    @staticmethod
+    def post_text(post: InstagramPost) -> str:
+        caption = post.ig_caption or ''
+        if caption.startswith(SOURCE_PREFIX):
+            caption = caption.split('\n', 1)[1] if '\n' in caption else ''
+        # 一併收錄原始新聞的英文標題與摘要，讓尚未有中文摘要的候選也能比對
+        news = post.news
+        return '\n'.join(part or '' for part in (post.ig_title, caption, news.title if news else '', news.summary if news else ''))
+
+    @staticmethod
+    def news_text(news: dict) -> str:
+        return '\n'.join(news.get(field) or '' for field in ('ai_title', 'ai_summary', 'title', 'summary'))
+
+    @staticmethod
+    def similarity(signatures: tuple, sketch) -> float:
+        """英文與中日韓文字分別估計 Jaccard 相似度，取較高者"""
+        return max(jaccard(signatures[0], sketch.signature), jaccard(signatures[1], sketch.cjk_signature))
+
+    def record(self, db: Session, post: InstagramPost, published_at=None) -> None:
+        """貼文發布時呼叫，將簽章加入索引"""
+        signature, cjk_signature = minhash_by_script(self.post_text(post))
+        upsert_published_sketch(db, post.id, post.news_id, signature, cjk_signature, published_at)
+
+    def filter(self, db: Session, news_list: Iterable[dict]) -> List[dict]:
+        """移除與時間範圍內已發布貼文相似的候選新聞，回傳保留的新聞；news_list 可為逐筆產生的迭代器"""
+        since = datetime.now(timezone.utc) - timedelta(hours=self.window_hours)
+        sketches = get_recent_published_sketches(db, since)
+        if not sketches:
+            return list(news_list)
+
+        kept = []
+        uncertain = []
+        total = 0
+        for news in news_list:
+            total += 1
+            signatures = minhash_by_script(self.news_text(news))
+            score, sketch = max(((self.similarity(signatures, sketch), sketch) for sketch in sketches),
+                                key=lambda pair: pair[0])
+            if score >= self.threshold:
+                logger.info(f"新聞 ID {news['id']} 與已發布的貼文 {sketch.instagram_post_id} 相似度 {score:.2f}，略過")
+                continue
+            if score >= self.review_threshold:
+                uncertain.append((news, sketch.instagram_post_id))
+            kept.append(news)
+
+        if uncertain:
+            published_ids = self.review(db, uncertain)
+            kept = [news for news in kept if news['id'] not in published_ids]
+
+        logger.info(f"與 {len(sketches)} 篇近期貼文比對後，{total} 條新聞中保留 {len(kept)} 條（{len(uncertain)} 條交由 LLM 判斷）")
+        return kept
+
+    def review(self, db: Session, uncertain: List[tuple]) -> Set[int]:
+        """uncertain 為 [(news, 最相似的貼文 ID)]，由 LLM 判斷是否為已發布的新聞，回傳判定已發布的新聞 ID；失敗時全部保留"""
+        post_ids = {post_id for _, post_id in uncertain}
+        posts = db.query(InstagramPost.id, InstagramPost.ig_title, InstagramPost.ig_caption).filter(InstagramPost.id.in_(post_ids)).all()
+        prompt = load_prompt_template('filter_published_news_prompt.txt').format(
+            news_list=[
+                {'id': news['id'], 'title': news['title'], 'summary': news['summary'],
+                 'ai_title': news.get('ai_title'), 'ai_summary': news.get('ai_summary'), 'similar_post_id': post_id}
+                for news, post_id in uncertain
+            ],
+            total_news=len(uncertain),
+            recent_published_ig_posts=[{'id': post.id, 'title': post.ig_title, 'caption': post.ig_caption} for post in posts],
+        )
+
+        try:
+            response = get_openai_client().chat.completions.create(
+                model="gpt-4o-2024-08-06",
+                temperature=0,
+                messages=[
+                    {"role": "system", "content": "You are a professional news editor skilled at filtering out published news."},
+                    {"role": "user", "content": prompt}
+                ],
+                tools=[{
+                    "type": "function",
+                    "function": {
+                        "name": "output_unpublished_news",
+                        "description": "Output the candidate news items that have not been published, keeping the original IDs.",
+                        "parameters": UnpublishedNewsParameters.model_json_schema()
+                    }
+                }]
+            )
+            tool_call = response.choices[0].message.tool_calls[0]
+            unpublished = UnpublishedNewsParameters.model_validate_json(tool_call.function.arguments).unpublished_news
+        except Exception as e:
+            logger.error(f"LLM 判斷是否已發布時出錯，保留 {len(uncertain)} 條待判斷的新聞：{str(e)}")
+            return set()
+
+        unpublished_ids = {item.id for item in unpublished}
+        published_ids = {news['id'] for news, _ in uncertain} - unpublished_ids
+        logger.info(f"LLM 判斷 {len(uncertain)} 條相似度不確定的新聞中有 {len(published_ids)} 條已發布")
+        return published_ids
+
+    def rebuild(self, db: Session, hours: int) -> int:
+        """重新計算時間範圍內所有已發布貼文的簽章（已有簽章的也會覆寫），回傳處理的貼文數；比對特徵變更後需執行"""
+        since = datetime.now(timezone.utc) - timedelta(hours=hours)
+        rows = (
+            db.query(Published, InstagramPost)
+            .join(InstagramPost, Published.instagram_post_id == InstagramPost.id)
+            .options(joinedload(InstagramPost.news))
+            .filter(Published.published_at >= since)
+            .all()
+        )
+        for published, post in rows:
+            self.record(db, post, published.published_at)
+        return len(rows)
+
+def calibrate(pairs: List[dict], thresholds: List[float], review_threshold: float) -> List[dict]:
+    """pairs 為 [{'same': bool, 'post': {ig_title, ig_caption, title, summary}, 'news': {ai_title, ai_summary, title, summary}}]，
+    回傳各門檻直接略過的比例（召回率、誤判率）與交由 LLM 判斷的比例"""
+    scores = []
+    for pair in pairs:
+        post = pair['post']
+        post_signatures = minhash_by_script(PublishedIndex.post_text(SimpleNamespace(
+            ig_title=post['ig_title'], ig_caption=post['ig_caption'],
+            news=SimpleNamespace(title=post['title'], summary=post['summary']),
+        )))
+        sketch = SimpleNamespace(signature=post_signatures[0], cjk_signature=post_signatures[1])
+        scores.append((pair['same'], PublishedIndex.similarity(minhash_by_script(PublishedIndex.news_text(pair['news'])), sketch)))
+
+    same = [score for is_same, score in scores if is_same]
+    different = [score for is_same, score in scores if not is_same]
+
+    def ratio(values, low, high=float('inf')):
+        return sum(low <= value < high for value in values) / len(values) if values else 0.0
+
+    return [
+        {
+            'threshold': threshold,
+            'recall': ratio(same, threshold),
+            'false_positive_rate': ratio(different, threshold),
+            'review_same': ratio(same, review_threshold, threshold),
+            'review_different': ratio(different, review_threshold, threshold),
+        }
+        for threshold in thresholds
+    ]
+
+def main():
+    import argparse
+    import json
+    import os
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    default_pairs = os.path.join(os.path.dirname(__file__), 'fixtures', 'pairs', 'published_pairs.json')
+    parser = argparse.ArgumentParser(description="管理已發布貼文的相似度索引")
+    parser.add_argument('action', choices=['rebuild', 'calibrate'],
+                        help="選擇操作：rebuild（重新計算已發布貼文的簽章）或 calibrate（以標註的貼文與候選配對評估門檻）")
+    parser.add_argument('--hours', type=int, default=PUBLISHED_FILTER_WINDOW_HOURS, help='rebuild 處理的時間範圍（小時）')
+    parser.add_argument('--pairs', default=default_pairs, help='標註的配對 JSON，預設使用 fixtures/pairs/published_pairs.json')
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.14, 0.16, 0.18, 0.2, 0.22, 0.25, 0.3, 0.4],
+                        help='calibrate 要評估的門檻')
+    parser.add_argument('--review-threshold', type=float, default=PUBLISHED_FILTER_REVIEW_THRESHOLD,
+                        help='calibrate 時交由 LLM 判斷的下限')
+    args = parser.parse_args()
+
+    if args.action == 'calibrate':
+        with open(args.pairs, encoding='utf-8') as f:
+            pairs = json.load(f)
+        same = sum(1 for pair in pairs if pair['same'])
+        print(f"{len(pairs)} 組配對（已發布的新聞 {same} 組，未發布的新聞 {len(pairs) - same} 組），"
+              f"目前門檻 {PUBLISHED_FILTER_THRESHOLD}，LLM 判斷下限 {args.review_threshold}")
+        for row in calibrate(pairs, args.thresholds, args.review_threshold):
+            print(f"門檻 {row['threshold']:.2f}：召回率 {row['recall']:.0%}，誤判率 {row['false_positive_rate']:.0%}，"
+                  f"交由 LLM 判斷：已發布 {row['review_same']:.0%}、未發布 {row['review_different']:.0%}")
+        return
+
+    SessionLocal = sessionmaker(bind=create_engine(DATABASE_URL))
+    with SessionLocal() as db:
+        if args.action == 'rebuild':
+            print(f"已重新計算 {PublishedIndex().rebuild(db, args.hours)} 篇已發布貼文的簽章")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import logging
+import threading
+
+from src.config.settings import STANDIN_HOST, STANDIN_PORTS
+from src.standin import feed_server, graph_server, imgur_server, jina_server, openai_server
+from src.standin.base import FaultInjector
+
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="啟動 OpenAI、Jina、Imgur、Graph API 與 RSS Feed 的本地替身伺服器")
+    parser.add_argument('--host', default=STANDIN_HOST)
+    parser.add_argument('--latency', type=float, default=0.0, help='每個請求的平均延遲（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延遲的隨機變動範圍（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='回應 500 的比例')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='回應 429 的比例')
+    parser.add_argument('--seed', type=int, default=0, help='隨機種子，相同種子可重現相同的延遲與錯誤序列')
+    parser.add_argument('--batch-delay', type=float, default=0.0, help='批次任務建立後經過幾秒才完成')
+    parser.add_argument('--paragraphs', type=int, default=8, help='Jina 替身文章的段落數')
+    parser.add_argument('--feed-items', type=int, default=20, help='每個替身 Feed 的新聞數')
+    parser.add_argument('--feed-interval', type=int, default=600, help='替身 Feed 每隔幾秒出現一則新聞')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    def injector(offset):
+        # 每個伺服器使用不同的種子，錯誤不會同時發生在所有上游
+        return FaultInjector(args.latency, args.jitter, args.error_rate, args.rate_limit_rate, args.seed + offset)
+
+    servers = {
+        'openai': openai_server.create_server(args.host, STANDIN_PORTS['openai'], args.batch_delay, injector(0)),
+        'jina': jina_server.create_server(args.host, STANDIN_PORTS['jina'], args.paragraphs, injector(1)),
+        'imgur': imgur_server.create_server(args.host, STANDIN_PORTS['imgur'], injector(2)),
+        'graph': graph_server.create_server(args.host, STANDIN_PORTS['graph'], injector(3)),
+        'feed': feed_server.create_server(args.host, STANDIN_PORTS['feed'], args.feed_items, args.feed_interval, injector(4)),
+    }
+    for name, server in servers.items():
+        threading.Thread(target=server.serve_forever, name=f"standin-{name}", daemon=True).start()
+        logger.info(f"{name} 替身伺服器啟動於 http://{args.host}:{server.server_address[1]}")
+    logger.info("設定 API_PROFILE=standin 後執行主程式即可使用替身伺服器")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers.values():
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    main()
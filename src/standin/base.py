@@ -0,0 +1,100 @@
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class FaultInjector:
+    """為替身伺服器加入可重現的延遲與錯誤，seed 相同時每次執行的結果一致"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def next_fault(self) -> tuple:
+        """回傳（延遲秒數, 要回應的錯誤狀態碼或 None）"""
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 500
+        return delay, None
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """替身伺服器的共用處理流程，子類別實作 handle_get / handle_post"""
+
+    protocol_version = 'HTTP/1.1'
+    injector: FaultInjector = FaultInjector()
+    name = 'standin'
+
+    def log_message(self, format, *args):
+        logger.debug(f"[{self.name}] {format % args}")
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def send_bytes(self, data: bytes, content_type: str, status: int = 200, headers: dict = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, payload, status: int = 200, headers: dict = None) -> None:
+        self.send_bytes(json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json', status, headers)
+
+    def send_error_json(self, status: int, message: str, headers: dict = None) -> None:
+        self.send_json({'error': {'message': message, 'type': 'standin_error', 'code': status}}, status, headers)
+
+    def _dispatch(self, handler, body: bytes = b'') -> None:
+        delay, status = self.injector.next_fault()
+        if delay:
+            time.sleep(delay)
+        if status == 429:
+            return self.send_error_json(429, "替身伺服器模擬的速率限制", {'Retry-After': '1'})
+        if status:
+            return self.send_error_json(status, "替身伺服器模擬的錯誤")
+
+        path, _, query = self.path.partition('?')
+        try:
+            handler(path, query, body)
+        except Exception as e:
+            logger.exception(f"[{self.name}] 處理請求失敗：{self.command} {path}")
+            self.send_error_json(500, str(e))
+
+    def do_GET(self):
+        self._dispatch(lambda path, query, body: self.handle_get(path, query))
+
+    def do_POST(self):
+        # HTTP/1.1 保持連線，無論是否注入錯誤都必須先讀完請求內容
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._dispatch(self.handle_post, body)
+
+    def handle_get(self, path: str, query: str) -> None:
+        self.send_error_json(404, f"不支援的路徑：{path}")
+
+    def handle_post(self, path: str, query: str, body: bytes) -> None:
+        self.send_error_json(404, f"不支援的路徑：{path}")
+
+def create_server(handler_class, host: str, port: int, injector: FaultInjector = None, **attributes) -> ThreadingHTTPServer:
+    # 每個伺服器使用獨立的子類別，避免共用狀態
+    attributes['injector'] = injector or FaultInjector()
+    handler = type(handler_class.__name__, (handler_class,), attributes)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,75 @@
+import hashlib
+import random
+import time
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer
+from urllib.parse import unquote
+from xml.sax.saxutils import escape
+
+from src.standin.base import FaultInjector, StandinHandler, create_server as create_standin_server
+
+WORDS = [
+    'central', 'bank', 'rates', 'inflation', 'election', 'trade', 'tariff', 'energy', 'oil', 'chip',
+    'market', 'shares', 'policy', 'growth', 'jobs', 'supply', 'currency', 'yields', 'europe', 'china',
+]
+
+def fake_story(seed: int) -> tuple:
+    """依種子產生固定的標題與摘要"""
+    rng = random.Random(seed)
+    title = ' '.join(rng.choice(WORDS) for _ in range(8)).capitalize()
+    summary = ' '.join(rng.choice(WORDS) for _ in range(40)).capitalize() + '.'
+    return title, summary
+
+def fake_feed(url: str, now: float, items: int, interval: int) -> tuple:
+    """依 Feed 網址產生 RSS 2.0 文件，每 interval 秒出現一則新聞，回傳（內容, ETag）
+
+    偶數時段的新聞各 Feed 相同，模擬多家媒體報導同一則新聞；奇數時段為各 Feed 獨有。
+    """
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]
+    latest = int(now // interval)
+    entries = []
+    for slot in range(latest, latest - items, -1):
+        seed = slot if slot % 2 == 0 else int(hashlib.sha1(f"{digest}-{slot}".encode('utf-8')).hexdigest()[:8], 16)
+        title, summary = fake_story(seed)
+        entries.append(
+            "<item>"
+            f"<title>{escape(title)}</title>"
+            f"<link>https://standin.example-news.org/{digest}/{slot}</link>"
+            f"<description>{escape(f'<p>{summary}</p>')}</description>"
+            f"<pubDate>{formatdate(slot * interval, usegmt=True)}</pubDate>"
+            "</item>"
+        )
+    document = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0"><channel>'
+        f"<title>Stand-in feed {digest}</title><link>{escape(url)}</link>"
+        f"{''.join(entries)}"
+        '</channel></rss>'
+    )
+    return document.encode('utf-8'), f'"{digest}-{latest}"'
+
+class FeedStandinHandler(StandinHandler):
+    name = 'feed'
+    items = 20
+    interval = 600
+
+    def handle_get(self, path: str, query: str) -> None:
+        target = unquote(path.lstrip('/'))
+        if query:
+            target = f"{target}?{query}"
+        if not target.startswith(('http://', 'https://')):
+            return self.send_error_json(400, "請在路徑中提供完整的 Feed 網址")
+
+        content, etag = fake_feed(target, time.time(), self.items, self.interval)
+        # 支援條件式請求，Feed 未更新時回應 304
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_bytes(content, 'application/rss+xml; charset=utf-8', headers={'ETag': etag})
+
+def create_server(host: str = '127.0.0.1', port: int = 8104, items: int = 20, interval: int = 600,
+                  injector: FaultInjector = None) -> ThreadingHTTPServer:
+    return create_standin_server(FeedStandinHandler, host, port, injector, items=items, interval=interval)
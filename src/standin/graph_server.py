@@ -0,0 +1,47 @@
+import itertools
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+from src.standin.base import FaultInjector, StandinHandler, create_server as create_standin_server
+
+class GraphStandinHandler(StandinHandler):
+    name = 'graph'
+    containers: dict = None
+    ids = None
+    lock = None
+
+    def handle_post(self, path: str, query: str, body: bytes) -> None:
+        # 路徑格式：/{版本}/{帳號 ID}/media 或 /{版本}/{帳號 ID}/media_publish
+        parts = path.strip('/').split('/')
+        fields = dict(parse_qsl(body.decode('utf-8')))
+        if not fields.get('access_token'):
+            return self.send_error_json(400, "缺少 access_token")
+
+        if len(parts) == 3 and parts[2] == 'media':
+            if not fields.get('image_url'):
+                return self.send_error_json(400, "缺少 image_url")
+            with self.lock:
+                container_id = f"standin-container-{next(self.ids)}"
+                self.containers[container_id] = fields
+            return self.send_json({'id': container_id})
+
+        if len(parts) == 3 and parts[2] == 'media_publish':
+            if fields.get('creation_id') not in self.containers:
+                return self.send_error_json(400, f"找不到媒體容器：{fields.get('creation_id')}")
+            with self.lock:
+                return self.send_json({'id': f"standin-media-{next(self.ids)}"})
+
+        self.send_error_json(404, f"不支援的路徑：{path}")
+
+    def handle_get(self, path: str, query: str) -> None:
+        if path.rstrip('/').endswith('/oauth/access_token'):
+            params = dict(parse_qsl(query))
+            if params.get('grant_type') != 'fb_exchange_token':
+                return self.send_error_json(400, "grant_type 必須為 fb_exchange_token")
+            return self.send_json({'access_token': 'standin-token', 'token_type': 'bearer', 'expires_in': 5184000})
+        self.send_error_json(404, f"不支援的路徑：{path}")
+
+def create_server(host: str = '127.0.0.1', port: int = 8103, injector: FaultInjector = None) -> ThreadingHTTPServer:
+    return create_standin_server(GraphStandinHandler, host, port, injector,
+                                 containers={}, ids=itertools.count(1), lock=threading.Lock())
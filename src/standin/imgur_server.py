@@ -0,0 +1,47 @@
+import base64
+import itertools
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+from src.standin.base import FaultInjector, StandinHandler, create_server as create_standin_server
+
+class ImgurStandinHandler(StandinHandler):
+    name = 'imgur'
+    images: dict = None
+    ids = None
+    lock = None
+
+    def handle_post(self, path: str, query: str, body: bytes) -> None:
+        if path.rstrip('/') not in ('/3/image', '/3/upload'):
+            return self.send_error_json(404, f"不支援的路徑：{path}")
+        if not self.headers.get('Authorization', '').startswith('Client-ID '):
+            return self.send_json({'data': {'error': '缺少 Client-ID'}, 'success': False, 'status': 403}, 403)
+
+        fields = dict(parse_qsl(body.decode('utf-8')))
+        if not fields.get('image'):
+            return self.send_json({'data': {'error': '缺少 image 欄位'}, 'success': False, 'status': 400}, 400)
+
+        with self.lock:
+            image_id = f"standin{next(self.ids)}"
+            self.images[image_id] = base64.b64decode(fields['image'])
+        self.send_json({
+            'data': {
+                'id': image_id,
+                'type': 'image/png',
+                'size': len(self.images[image_id]),
+                'link': f"{self.base_url}/i/{image_id}.png",
+            },
+            'success': True,
+            'status': 200,
+        })
+
+    def handle_get(self, path: str, query: str) -> None:
+        image_id = path.rsplit('/', 1)[-1].rsplit('.', 1)[0]
+        if path.startswith('/i/') and image_id in self.images:
+            return self.send_bytes(self.images[image_id], 'image/png')
+        self.send_error_json(404, f"找不到圖片：{path}")
+
+def create_server(host: str = '127.0.0.1', port: int = 8102, injector: FaultInjector = None) -> ThreadingHTTPServer:
+    return create_standin_server(ImgurStandinHandler, host, port, injector,
+                                 images={}, ids=itertools.count(1), lock=threading.Lock())
@@ -0,0 +1,61 @@
+import hashlib
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer
+from urllib.parse import unquote
+
+from src.standin.base import FaultInjector, StandinHandler, create_server as create_standin_server
+
+SENTENCES = [
+    "Officials said the decision followed weeks of negotiations between the parties involved.",
+    "Analysts expect the move to affect markets in the coming months.",
+    "The announcement drew mixed reactions from industry groups and lawmakers.",
+    "Further details are expected to be released later this week.",
+    "Critics argued that the plan does not go far enough to address the underlying issues.",
+    "Supporters said the measures would bring long-term stability.",
+]
+
+def fake_article(url: str, paragraphs: int) -> str:
+    """依網址產生固定內容的 Jina Reader 格式文章，含導覽列與頁尾雜訊"""
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    seed = int(digest[:8], 16)
+    body = []
+    for index in range(paragraphs):
+        sentences = [SENTENCES[(seed + index + offset) % len(SENTENCES)] for offset in range(3)]
+        body.append(f"Paragraph {index + 1} of stand-in article {digest[:8]}. " + ' '.join(sentences))
+
+    lines = [
+        f"Title: Stand-in article {digest[:8]}",
+        "",
+        f"URL Source: {url}",
+        "",
+        f"Published Time: {datetime.now(timezone.utc).isoformat()}",
+        "",
+        "Markdown Content:",
+        "[Skip to content](#main)",
+        "",
+        "*   [Home](https://example.com/)",
+        "*   [World](https://example.com/world)",
+        "",
+        f"![Image 1: Illustration](https://example.com/images/{digest[:8]}.jpg)",
+        "",
+        '\n\n'.join(body),
+        "",
+        "Copyright Stand-in News. All rights reserved.",
+    ]
+    return '\n'.join(lines)
+
+class JinaStandinHandler(StandinHandler):
+    name = 'jina'
+    paragraphs = 8
+
+    def handle_get(self, path: str, query: str) -> None:
+        target = unquote(path.lstrip('/'))
+        if query:
+            target = f"{target}?{query}"
+        if not target.startswith(('http://', 'https://')):
+            return self.send_error_json(400, "請在路徑中提供完整的文章網址")
+        self.send_bytes(fake_article(target, self.paragraphs).encode('utf-8'), 'text/plain; charset=utf-8')
+
+def create_server(host: str = '127.0.0.1', port: int = 8101, paragraphs: int = 8,
+                  injector: FaultInjector = None) -> ThreadingHTTPServer:
+    return create_standin_server(JinaStandinHandler, host, port, injector, paragraphs=paragraphs)
@@ -0,0 +1,222 @@
+import hashlib
+import io
+import itertools
+import json
+import logging
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from functools import lru_cache
+from http.server import ThreadingHTTPServer
+from typing import Dict
+
+from src.standin.base import FaultInjector, StandinHandler, create_server as create_standin_server
+
+logger = logging.getLogger(__name__)
+
+class StandinState:
+    """替身伺服器的記憶體內狀態：上傳的檔案與批次任務"""
+
+    def __init__(self, batch_delay: float = 0.0):
+        self.batch_delay = batch_delay
+        self.files: Dict[str, dict] = {}
+        self.batches: Dict[str, dict] = {}
+        self.lock = threading.RLock()
+        self._ids = itertools.count(1)
+
+    def next_id(self, prefix: str) -> str:
+        return f"{prefix}-standin-{next(self._ids)}"
+
+    def add_file(self, filename: str, purpose: str, content: bytes) -> dict:
+        with self.lock:
+            file_id = self.next_id('file')
+            self.files[file_id] = {
+                'meta': {
+                    'id': file_id,
+                    'object': 'file',
+                    'bytes': len(content),
+                    'created_at': int(time.time()),
+                    'filename': filename,
+                    'purpose': purpose,
+                    'status': 'processed',
+                },
+                'content': content,
+            }
+            return self.files[file_id]['meta']
+
+    def create_batch(self, input_file_id: str, endpoint: str, completion_window: str, metadata: dict) -> dict:
+        with self.lock:
+            batch_id = self.next_id('batch')
+            self.batches[batch_id] = {
+                'id': batch_id,
+                'object': 'batch',
+                'endpoint': endpoint,
+                'input_file_id': input_file_id,
+                'completion_window': completion_window,
+                'status': 'in_progress',
+                'output_file_id': None,
+                'error_file_id': None,
+                'created_at': int(time.time()),
+                'metadata': metadata,
+                'request_counts': {'total': 0, 'completed': 0, 'failed': 0},
+            }
+            return self.batches[batch_id]
+
+    def get_batch(self, batch_id: str) -> dict:
+        with self.lock:
+            batch = self.batches[batch_id]
+            # 超過設定的延遲後才完成，模擬真實批次任務的非同步行為
+            if batch['status'] == 'in_progress' and time.time() - batch['created_at'] >= self.batch_delay:
+                self._complete_batch(batch)
+            return batch
+
+    def _complete_batch(self, batch: dict) -> None:
+        requests = [json.loads(line) for line in self.files[batch['input_file_id']]['content'].splitlines() if line.strip()]
+        output = '\n'.join(json.dumps(fake_batch_result(request), ensure_ascii=False) for request in requests)
+        batch['output_file_id'] = self.add_file('batch_output.jsonl', 'batch_output', output.encode('utf-8'))['id']
+        batch['request_counts'] = {'total': len(requests), 'completed': len(requests), 'failed': 0}
+        batch['status'] = 'completed'
+        batch['completed_at'] = int(time.time())
+
+def fake_arguments(schema: dict, user_content: str) -> dict:
+    """依工具的 JSON Schema 產生參數；整數欄位優先使用提示中出現的新聞或貼文 ID"""
+    ids = [int(value) for value in re.findall(r"['\"]id['\"]:\s*(\d+)", user_content)]
+    digest = hashlib.sha1(user_content.encode('utf-8')).hexdigest()[:6]
+    definitions = schema.get('$defs', {})
+
+    def value(prop: dict, name: str, index: int = 0):
+        if '$ref' in prop:
+            prop = definitions[prop['$ref'].rsplit('/', 1)[-1]]
+        kind = prop.get('type')
+        if kind == 'integer':
+            return ids[index % len(ids)] if ids else index + 1
+        if kind == 'number':
+            return 0.0
+        if kind == 'boolean':
+            return False
+        if kind == 'array':
+            return [value(prop.get('items', {}), name, i) for i in range(min(len(ids), 10) or 1)]
+        if kind == 'object':
+            return {key: value(sub, key, index) for key, sub in prop.get('properties', {}).items()}
+        return f"替身{name} {digest}"
+
+    return value({'type': 'object', 'properties': schema.get('properties', {})}, 'arguments')
+
+def fake_chat_completion(body: dict) -> dict:
+    """依請求中的工具定義產生固定格式的回應"""
+    messages = body.get('messages', [])
+    user_content = messages[-1]['content'] if messages else ''
+    message = {'role': 'assistant', 'content': f"[stand-in] {user_content[:80]}"}
+    finish_reason = 'stop'
+
+    tools = body.get('tools') or []
+    if tools:
+        function = tools[0]['function']
+        arguments = fake_arguments(function.get('parameters', {}), user_content)
+        message = {
+            'role': 'assistant',
+            'content': None,
+            'tool_calls': [{
+                'id': 'call-standin',
+                'type': 'function',
+                'function': {'name': function['name'], 'arguments': json.dumps(arguments, ensure_ascii=False)},
+            }],
+        }
+        finish_reason = 'tool_calls'
+
+    return {
+        'id': 'chatcmpl-standin',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': body.get('model', 'stand-in'),
+        'choices': [{'index': 0, 'message': message, 'finish_reason': finish_reason}],
+        'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+    }
+
+@lru_cache(maxsize=1)
+def standin_png() -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (1024, 1024), (96, 96, 96)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def fake_batch_result(request: dict) -> dict:
+    return {
+        'id': f"batch-req-{request['custom_id']}",
+        'custom_id': request['custom_id'],
+        'response': {'status_code': 200, 'request_id': 'req-standin', 'body': fake_chat_completion(request['body'])},
+        'error': None,
+    }
+
+def parse_multipart(content_type: str, body: bytes) -> dict:
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode('utf-8') + body
+    )
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        fields[name] = {'filename': part.get_filename(), 'content': part.get_payload(decode=True)}
+    return fields
+
+class OpenAIStandinHandler(StandinHandler):
+    name = 'openai'
+    state: StandinState = None
+
+    def handle_post(self, path: str, query: str, body: bytes) -> None:
+        path = path.rstrip('/')
+        if path == '/v1/files':
+            fields = parse_multipart(self.headers['Content-Type'], body)
+            upload = fields.get('file')
+            if not upload:
+                return self.send_error_json(400, "缺少 file 欄位")
+            purpose = fields.get('purpose', {}).get('content', b'').decode('utf-8')
+            return self.send_json(self.state.add_file(upload['filename'], purpose, upload['content']))
+
+        if path == '/v1/batches':
+            payload = json.loads(body)
+            if payload.get('input_file_id') not in self.state.files:
+                return self.send_error_json(404, f"找不到檔案：{payload.get('input_file_id')}")
+            return self.send_json(self.state.create_batch(
+                payload['input_file_id'], payload['endpoint'], payload['completion_window'], payload.get('metadata')
+            ))
+
+        if path == '/v1/chat/completions':
+            return self.send_json(fake_chat_completion(json.loads(body)))
+
+        if path == '/v1/images/generations':
+            payload = json.loads(body)
+            return self.send_json({
+                'created': int(time.time()),
+                'data': [{'url': f"{self.base_url}/images/standin.png", 'revised_prompt': payload.get('prompt', '')}],
+            })
+
+        self.send_error_json(404, f"不支援的路徑：{path}")
+
+    def handle_get(self, path: str, query: str) -> None:
+        parts = path.strip('/').split('/')
+
+        if parts[:2] == ['v1', 'batches'] and len(parts) == 3:
+            if parts[2] not in self.state.batches:
+                return self.send_error_json(404, f"找不到批次任務：{parts[2]}")
+            return self.send_json(self.state.get_batch(parts[2]))
+
+        if parts[:2] == ['v1', 'files'] and len(parts) in (3, 4):
+            stored = self.state.files.get(parts[2])
+            if not stored:
+                return self.send_error_json(404, f"找不到檔案：{parts[2]}")
+            if len(parts) == 3:
+                return self.send_json(stored['meta'])
+            if parts[3] == 'content':
+                return self.send_bytes(stored['content'], 'application/octet-stream')
+
+        if parts[0] == 'images':
+            return self.send_bytes(standin_png(), 'image/png')
+
+        self.send_error_json(404, f"不支援的路徑：{path}")
+
+def create_server(host: str = '127.0.0.1', port: int = 8100, batch_delay: float = 0.0,
+                  injector: FaultInjector = None) -> ThreadingHTTPServer:
+    return create_standin_server(OpenAIStandinHandler, host, port, injector, state=StandinState(batch_delay))
@@ -0,0 +1,44 @@
+import zlib
+
+# 此模組不依賴 src 套件，供 Streamlit 的 app.py 直接匯入
+try:
+    import zstandard
+except ImportError:  # 未安裝 zstandard 時改用 zlib
+    zstandard = None
+
+IDENTITY = 'identity'
+ZLIB = 'zlib'
+ZSTD = 'zstd'
+
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+
+def should_compress(content_type: str) -> bool:
+    # PNG 等格式本身已壓縮，只壓縮文字內容
+    return bool(content_type) and content_type.startswith('text/')
+
+def compress(data: bytes, content_type: str) -> tuple:
+    if data is None or not should_compress(content_type):
+        return data, IDENTITY
+    if zstandard is not None:
+        compressed, encoding = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data), ZSTD
+    else:
+        compressed, encoding = zlib.compress(data, ZLIB_LEVEL), ZLIB
+    # 壓縮後沒有變小就保留原始內容
+    if len(compressed) >= len(data):
+        return data, IDENTITY
+    return compressed, encoding
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    if data is None:
+        return None
+    data = bytes(data)
+    if not encoding or encoding == IDENTITY:
+        return data
+    if encoding == ZLIB:
+        return zlib.decompress(data)
+    if encoding == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("此文件以 zstd 壓縮，請先安裝 zstandard 套件")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"不支援的文件編碼：{encoding}")
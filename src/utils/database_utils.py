@@ -25,7 +25,7 @@ def get_news_image(news_id):
         if news and news.png_file_id:
             file = session.query(File).filter(File.id == news.png_file_id).first()
             if file:
-                return file.data
+                return file.content
     return None
 
 def get_published_instagram_post_ids():
@@ -0,0 +1,179 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.config.settings import FETCH_CACHE_PATH, FETCH_CACHE_MAX_SIZE_MB, FETCH_CACHE_TTL
+from src.utils.compression import compress, decompress
+
+logger = logging.getLogger(__name__)
+
+# 不影響文章內容的追蹤參數，計算快取鍵時移除
+TRACKING_PARAMS = {'fbclid', 'gclid', 'ocid', 'cmpid', 'mod', 'ref', 'smid', 'srnd', 'at_medium', 'at_campaign'}
+
+def canonicalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', urlencode(query), ''))
+
+class FetchCache:
+    """以 SQLite 保存已擷取的文章內容，依 TTL 過期並以 LRU 控制總大小"""
+
+    def __init__(self, path: str = FETCH_CACHE_PATH, max_size_mb: int = FETCH_CACHE_MAX_SIZE_MB,
+                 ttl: int = FETCH_CACHE_TTL):
+        self.path = path
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                encoding TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+            CREATE INDEX IF NOT EXISTS entries_fetched_at ON entries (fetched_at);
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        self._conn.commit()
+        # 目前的總大小，寫入時隨之增減，不必每次加總整個資料表
+        self._total_size = self._sum_size()
+
+    def _sum_size(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _increment(self, name: str, amount: int = 1) -> None:
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+
+    def get(self, url: str) -> Optional[str]:
+        key = canonicalize_url(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, encoding, fetched_at, size FROM entries WHERE url = ?", (key,)
+            ).fetchone()
+            if row and now - row[2] <= self.ttl:
+                self._conn.execute("UPDATE entries SET accessed_at = ? WHERE url = ?", (now, key))
+                self._increment('hits')
+                self._conn.commit()
+                return decompress(row[0], row[1]).decode('utf-8')
+
+            if row:
+                self._conn.execute("DELETE FROM entries WHERE url = ?", (key,))
+                self._total_size -= row[3]
+            self._increment('misses')
+            self._conn.commit()
+        return None
+
+    def set(self, url: str, body: str) -> None:
+        key = canonicalize_url(url)
+        data, encoding = compress(body.encode('utf-8'), 'text/markdown')
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM entries WHERE url = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (url, body, encoding, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, data, encoding, len(data), now, now)
+            )
+            self._total_size += len(data) - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        expires_before = time.time() - self.ttl
+        # fetched_at 有索引，只會讀取已過期的資料
+        expired_size = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries WHERE fetched_at < ?", (expires_before,)
+        ).fetchone()[0]
+        if expired_size:
+            self._conn.execute("DELETE FROM entries WHERE fetched_at < ?", (expires_before,))
+            self._total_size -= expired_size
+        total = self._total_size
+        if total <= self.max_bytes:
+            return
+
+        # 依最久未使用的順序刪除，直到總大小低於上限
+        evicted = 0
+        for url, size in self._conn.execute("SELECT url, size FROM entries ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+            total -= size
+            evicted += 1
+        self._total_size = total
+        if evicted:
+            self._increment('evictions', evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            expired = self._conn.execute(
+                "SELECT COUNT(*) FROM entries WHERE fetched_at < ?", (time.time() - self.ttl,)
+            ).fetchone()[0]
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        return {
+            'path': self.path,
+            'entries': entries,
+            'expired': expired,
+            'size_mb': total_size / 1024 / 1024,
+            'max_size_mb': self.max_bytes / 1024 / 1024,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'evictions': counters.get('evictions', 0),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM counters")
+            self._conn.commit()
+            self._total_size = 0
+            self._conn.execute("VACUUM")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="文章擷取快取管理工具")
+    parser.add_argument('action', choices=['stats', 'clear'], help="選擇操作：stats（顯示快取統計）或 clear（清空快取）")
+    args = parser.parse_args()
+
+    cache = FetchCache()
+    if args.action == 'stats':
+        stats = cache.stats()
+        print(f"快取位置：{stats['path']}")
+        print(f"文章數：{stats['entries']}（已過期 {stats['expired']}）")
+        print(f"大小：{stats['size_mb']:.1f} / {stats['max_size_mb']:.0f} MB")
+        print(f"命中：{stats['hits']}，未命中：{stats['misses']}，命中率：{stats['hit_rate']:.1%}")
+        print(f"LRU 淘汰：{stats['evictions']}")
+    elif args.action == 'clear':
+        cache.clear()
+        print("快取已清空")
+
+if __name__ == "__main__":
+    main()
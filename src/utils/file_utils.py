@@ -1,13 +1,17 @@
 import re
 import os
+from functools import lru_cache
+from PIL import ImageFont
+from src.utils.text_measure import get_text_measure
 
 def get_text_width(font, text):
-    width = 0
-    for char in text:
-        bbox = font.getbbox(char)
-        char_width = bbox[2] - bbox[0]
-        width += char_width
-    return width
+    # 各字元寬度依字體快取，同一字元只量測一次
+    return get_text_measure(font).width(text)
+
+@lru_cache(maxsize=None)
+def load_font(font_path, font_size):
+    # 同一字體只載入一次，供各服務共用
+    return ImageFont.truetype(font_path, font_size)
 
 def load_prompt_template(prompt_filename):
     prompt_path = os.path.join(os.path.dirname(__file__), '..', 'services', 'prompts', prompt_filename)
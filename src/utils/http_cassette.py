@@ -0,0 +1,110 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import defaultdict, deque
+from typing import Dict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+OFF = 'off'
+RECORD = 'record'
+REPLAY = 'replay'
+
+# 不寫入 cassette 的查詢參數，也不參與請求比對
+SECRET_PARAMS = {'access_token', 'client_secret', 'fb_exchange_token', 'key', 'api_key'}
+
+# 重播時由 httpx 重新計算，不保留原始值
+DROPPED_RESPONSE_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+class CassetteMissError(httpx.TransportError):
+    """重播模式下 cassette 中沒有對應的請求"""
+    pass
+
+def request_key(request: httpx.Request) -> str:
+    parts = urlsplit(str(request.url))
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS))
+    url = urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, query, ''))
+
+    body = request.read()
+    content_type = request.headers.get('Content-Type', '')
+    if 'boundary=' in content_type:
+        # multipart 的分隔字串每次隨機產生，比對前換成固定值
+        boundary = content_type.split('boundary=', 1)[1].split(';')[0].strip('"')
+        body = body.replace(boundary.encode('latin-1'), b'cassette-boundary')
+    elif 'application/x-www-form-urlencoded' in content_type:
+        body = urlencode([(k, v) for k, v in parse_qsl(body.decode('utf-8'), keep_blank_values=True)
+                          if k not in SECRET_PARAMS]).encode('utf-8')
+
+    return f"{request.method} {url} {hashlib.sha256(body).hexdigest()}"
+
+class CassetteTransport(httpx.BaseTransport):
+    """在共用 HTTP 連線池下錄製或重播請求，cassette 為一行一筆的 JSONL 檔
+
+    重播時相同的請求依錄製順序回應，用完後重複最後一筆。
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, path: str, mode: str):
+        self.transport = transport
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._recorded: Dict[str, deque] = defaultdict(deque)
+        if mode == REPLAY:
+            self._load()
+        elif mode == RECORD:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"找不到 cassette：{self.path}，請先以 record 模式錄製")
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._recorded[entry['key']].append(entry)
+        logger.info(f"已載入 cassette {self.path}：{sum(len(v) for v in self._recorded.values())} 筆回應")
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request)
+        if self.mode == REPLAY:
+            return self._replay(key, request)
+
+        response = self.transport.handle_request(request)
+        try:
+            # httpx 讀取時已依 Content-Encoding 解碼，保存解碼後的內容
+            body = response.read()
+        finally:
+            response.close()
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in DROPPED_RESPONSE_HEADERS]
+        entry = {
+            'key': key,
+            'method': request.method,
+            'url': key.split(' ')[1],
+            'status': response.status_code,
+            'headers': headers,
+            'body': base64.b64encode(body).decode('ascii'),
+        }
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return httpx.Response(response.status_code, headers=headers, content=body, request=request,
+                              extensions={'http_version': response.extensions.get('http_version', b'HTTP/1.1')})
+
+    def _replay(self, key: str, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            entries = self._recorded.get(key)
+            if not entries:
+                raise CassetteMissError(f"cassette 中沒有此請求：{request.method} {request.url.copy_with(query=None)}",
+                                        request=request)
+            entry = entries.popleft() if len(entries) > 1 else entries[0]
+        return httpx.Response(entry['status'], headers=entry['headers'], content=base64.b64decode(entry['body']),
+                              request=request)
+
+    def close(self) -> None:
+        self.transport.close()
@@ -0,0 +1,76 @@
+import threading
+from urllib.parse import urlparse
+
+import httpx
+
+from src.config.settings import (
+    HTTP2_ENABLED,
+    HTTP_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_PER_HOST_LIMIT,
+    HTTP_CASSETTE_MODE,
+    HTTP_CASSETTE_PATH,
+)
+from src.utils.http_cassette import CassetteTransport, OFF
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # 未安裝 h2 時使用 HTTP/1.1
+    HTTP2_AVAILABLE = False
+
+_client = None
+_client_lock = threading.Lock()
+_host_semaphores = {}
+_host_lock = threading.Lock()
+
+def get_http_client() -> httpx.Client:
+    # 整個行程共用一個連線池，同一主機的連線會被保留並重複使用
+    global _client
+    with _client_lock:
+        if _client is None:
+            transport = httpx.HTTPTransport(
+                http2=HTTP2_ENABLED and HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                ),
+            )
+            # 錄製/重播模式下所有對外請求（含 OpenAI SDK）都經過 cassette
+            if HTTP_CASSETTE_MODE != OFF:
+                transport = CassetteTransport(transport, HTTP_CASSETTE_PATH, HTTP_CASSETTE_MODE)
+            _client = httpx.Client(
+                transport=transport,
+                timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+                follow_redirects=True,
+            )
+        return _client
+
+def close_http_client() -> None:
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+def _get_host_semaphore(url: str) -> threading.Semaphore:
+    host = urlparse(url).netloc.lower()
+    with _host_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.Semaphore(HTTP_PER_HOST_LIMIT)
+        return _host_semaphores[host]
+
+def request(method: str, url: str, **kwargs) -> httpx.Response:
+    # 限制對同一主機的同時請求數，避免單一上游被塞滿
+    with _get_host_semaphore(url):
+        return get_http_client().request(method, url, **kwargs)
+
+def get(url: str, **kwargs) -> httpx.Response:
+    return request('GET', url, **kwargs)
+
+def post(url: str, **kwargs) -> httpx.Response:
+    return request('POST', url, **kwargs)
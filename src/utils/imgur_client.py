@@ -0,0 +1,16 @@
+import base64
+
+from src.config.settings import IMGUR_API_URL
+from src.utils import http_client
+
+def upload_image(image_data: bytes, client_id: str) -> str:
+    """匿名上傳圖片到 Imgur，回傳圖片連結"""
+    # 與 imgurpython 的 upload_from_path(anon=True) 相同的 API，改走共用連線池且不需暫存檔
+    response = http_client.post(
+        f"{IMGUR_API_URL}/3/image",
+        headers={'Authorization': f'Client-ID {client_id}'},
+        data={'image': base64.b64encode(image_data).decode('ascii'), 'type': 'base64'},
+    )
+    if response.status_code != 200:
+        raise Exception(f"上傳圖片到 Imgur 失敗：狀態碼 {response.status_code} - {response.text[:200]}")
+    return response.json()['data']['link']
@@ -0,0 +1,23 @@
+import threading
+
+import httpx
+from openai import OpenAI
+
+from src.config.settings import OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_TIMEOUT, HTTP_CONNECT_TIMEOUT
+from src.utils.http_client import get_http_client
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_openai_client(api_key: str = OPENAI_API_KEY) -> OpenAI:
+    # 共用 HTTP 連線池，OPENAI_BASE_URL 與錄製/重播設定因此對所有 LLM 呼叫生效
+    http_client = get_http_client()
+    with _clients_lock:
+        cached = _clients.get(api_key)
+        # 共用連線池被關閉重建後，改用新的連線池
+        if cached is None or cached[1] is not http_client:
+            # 共用連線池的逾時是為抓取 Feed 設定的，長時間的 LLM 與圖片生成請求需另外指定
+            timeout = httpx.Timeout(OPENAI_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+            cached = (OpenAI(api_key=api_key, base_url=OPENAI_BASE_URL, http_client=http_client, timeout=timeout), http_client)
+            _clients[api_key] = cached
+        return cached[0]
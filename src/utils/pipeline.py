@@ -0,0 +1,101 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# 佇列結束標記，每個工作執行緒收到一個後結束
+_DONE = object()
+
+class Stage:
+    def __init__(self, name: str, func: Callable, workers: int):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.processed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed: float) -> None:
+        with self._lock:
+            self.processed += 1
+            self.busy_seconds += elapsed
+
+class Pipeline:
+    """以有界佇列串接多個執行緒池階段，下游處理不及時上游會在 put 時等待（背壓）
+
+    各階段的 func 接收上一階段的輸出並回傳要交給下一階段的項目，應自行處理預期內的錯誤；
+    未預期的例外會記錄後丟棄該項目。最後一階段的輸出由呼叫端在目前執行緒中逐一取得，
+    適合放置資料庫寫入等不能並行的工作。
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.stages: List[Stage] = []
+
+    def add_stage(self, name: str, func: Callable, workers: int) -> 'Pipeline':
+        self.stages.append(Stage(name, func, workers))
+        return self
+
+    def run(self, items: Iterable) -> Iterator:
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        start = time.monotonic()
+
+        def feed():
+            for item in items:
+                queues[0].put(item)
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+
+        threading.Thread(target=feed, name="pipeline-feed", daemon=True).start()
+        for index, stage in enumerate(self.stages):
+            # 下一階段的工作執行緒數，最後一階段只需通知呼叫端一次
+            downstream = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            for worker in range(stage.workers):
+                threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[index], queues[index + 1], remaining, lock, downstream),
+                    name=f"pipeline-{stage.name}-{worker}",
+                    daemon=True,
+                ).start()
+
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                break
+            yield item
+
+        summary = '，'.join(
+            f"{stage.name} {stage.processed} 項（{stage.workers} 執行緒，累計 {stage.busy_seconds:.1f} 秒）"
+            for stage in self.stages
+        )
+        logger.info(f"管線完成，耗時 {time.monotonic() - start:.2f} 秒：{summary}")
+
+    @staticmethod
+    def _work(stage: Stage, inbox: queue.Queue, outbox: queue.Queue, remaining: list,
+              lock: threading.Lock, downstream: int) -> None:
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            started = time.monotonic()
+            try:
+                result = stage.func(item)
+            except Exception:
+                logger.exception(f"管線階段 {stage.name} 處理項目時發生未預期的錯誤")
+                continue
+            finally:
+                stage.record(time.monotonic() - started)
+            outbox.put(result)
+
+        # 同一階段的最後一個執行緒結束時通知下游
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            for _ in range(downstream):
+                outbox.put(_DONE)
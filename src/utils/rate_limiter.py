@@ -0,0 +1,66 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+class TokenBucket:
+    """執行緒安全的令牌桶，等待只會阻塞呼叫的工作執行緒"""
+
+    def __init__(self, calls: int, period: float, burst: int = 1):
+        self.rate = calls / period
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        # 上游要求降速（429 / Retry-After）時，暫停此上游的所有請求
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            # 暫停期間不累積令牌，恢復後依速率逐步放行，不會一次送出整個 burst
+            self.updated_at = self.paused_until
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def get_rate_limiter(name: str, calls: int, period: float, burst: int = 1) -> TokenBucket:
+    # 同一個上游在整個行程中共用一個令牌桶
+    with _buckets_lock:
+        if name not in _buckets:
+            _buckets[name] = TokenBucket(calls, period, burst)
+        return _buckets[name]
+
+def parse_retry_after(value: str, default: float) -> float:
+    if not value:
+        return default
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
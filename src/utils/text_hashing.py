@@ -0,0 +1,126 @@
+import hashlib
+import heapq
+import re
+from typing import List
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+ENTITY_PATTERN = re.compile(r'&#?\w+;')
+WORD_PATTERN = re.compile(r'[\u3400-\u9fff\uac00-\ud7af]+|[^\W_]+')
+CJK_PATTERN = re.compile(r'[\u3400-\u9fff\uac00-\ud7af]')
+NAME_PATTERN = re.compile(r"\b(?:[A-Z][\w'’-]*|\d[\d.,]*%?)")
+
+# 不影響新聞主題、但在標題與摘要中大量出現的英文字詞
+STOPWORDS = frozenset(
+    'a an and are as at be but by for from has have he her his in is it its of on or she that the their '
+    'they this to was were will with after over says said new no not more than up down out into about'.split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """取出比對用的字詞：去除 HTML 標籤，英文以單字為單位，中日韓文字逐字切開"""
+    text = ENTITY_PATTERN.sub(' ', TAG_PATTERN.sub(' ', text or '')).lower()
+    tokens = []
+    for word in WORD_PATTERN.findall(text):
+        if CJK_PATTERN.match(word):
+            tokens.extend(word)
+        elif word not in STOPWORDS:
+            tokens.append(word)
+    return tokens
+
+def _feature_hash(feature: str) -> int:
+    # 內建 hash() 每個行程的種子不同，改用固定的雜湊讓結果可以存入資料庫比對
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def _stem(word: str) -> str:
+    # 粗略去除英文字尾，讓 cut/cuts、rate/rates 等不同媒體的寫法視為同一字
+    for suffix in ('ing', 'ed', 'es', 's'):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+def names(text: str) -> set:
+    """取出大寫開頭的英文字與數字（人名、地名、公司、金額等），改寫同一則新聞時最常保留的字詞"""
+    text = ENTITY_PATTERN.sub(' ', TAG_PATTERN.sub(' ', text or ''))
+    found = set()
+    for word in NAME_PATTERN.findall(text):
+        word = word.lower().rstrip('.,')
+        if word.endswith(("'s", "’s")):
+            word = word[:-2]
+        if word and word not in STOPWORDS:
+            found.add(_stem(word))
+    return found
+
+# bottom-k MinHash 保留的最小雜湊數
+MINHASH_SIZE = 128
+
+def minhash_shingles(text: str) -> set:
+    """MinHash 使用的特徵
+
+    英文取去除字尾的單字，不同媒體改寫時語序與用字多半不同，相鄰兩字幾乎不會重複；
+    中日韓文字取相鄰兩字，單字太常見會拉高無關文章的相似度。
+    專有名詞與數字另外加入一次（加上 # 前綴），加重同一則新聞共有的人名、地名與數字。
+    """
+    tokens = tokenize(text)
+    features = {_stem(token) for token in tokens if not CJK_PATTERN.match(token)}
+    features.update(a + b for a, b in zip(tokens, tokens[1:]) if CJK_PATTERN.match(a) and CJK_PATTERN.match(b))
+    features.update(f"#{name}" for name in names(text))
+    return features
+
+def minhash(text: str, size: int = MINHASH_SIZE) -> tuple:
+    """回傳 (簽章, 特徵數)；簽章為特徵雜湊中最小的 size 個（bottom-k MinHash），取 63 位元可存入 BIGINT"""
+    features = minhash_shingles(text)
+    hashes = {_feature_hash(feature) >> 1 for feature in features}
+    return heapq.nsmallest(size, hashes), len(features)
+
+def minhash_by_script(text: str, size: int = MINHASH_SIZE) -> tuple:
+    """分別回傳英文與中日韓文字特徵的 bottom-k 簽章 (英文簽章, 中日韓簽章)
+
+    中英文混合的文字整體比對時，另一種語言的特徵會稀釋相似度，分開比對再取較高者。
+    """
+    latin, cjk = set(), set()
+    for feature in minhash_shingles(text):
+        (cjk if CJK_PATTERN.match(feature) else latin).add(_feature_hash(feature) >> 1)
+    return heapq.nsmallest(size, latin), heapq.nsmallest(size, cjk)
+
+def jaccard(signature: List[int], other: List[int], size: int = MINHASH_SIZE) -> float:
+    """由兩個 bottom-k 簽章估計 Jaccard 相似度"""
+    if not signature or not other:
+        return 0.0
+    mine, theirs = set(signature), set(other)
+    # 兩個集合聯集中最小的 size 個雜湊，是聯集的均勻樣本
+    union = heapq.nsmallest(size, mine | theirs)
+    return sum(1 for value in union if value in mine and value in theirs) / len(union)
+
+class MinHashIndex:
+    """找出 Jaccard 相似度不低於 threshold 的簽章
+
+    估計值大於 0 的兩個簽章至少共有一個雜湊值，以雜湊值建立反向索引，
+    只需比對共有雜湊的候選，不必與所有簽章逐一比較。
+    """
+
+    def __init__(self, threshold: float, size: int = MINHASH_SIZE):
+        self.threshold = threshold
+        self.size = size
+        self.buckets = {}
+        self.signatures = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def add(self, key, signature: List[int]) -> None:
+        self.signatures[key] = signature
+        for value in signature:
+            self.buckets.setdefault(value, []).append(key)
+
+    def nearest(self, signature: List[int]):
+        """回傳相似度最高且不低於 threshold 的 key，沒有時回傳 None"""
+        best_key, best_similarity = None, self.threshold
+        checked = set()
+        for value in signature:
+            for key in self.buckets.get(value, ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                similarity = jaccard(signature, self.signatures[key], self.size)
+                if similarity >= best_similarity:
+                    best_key, best_similarity = key, similarity
+        return best_key
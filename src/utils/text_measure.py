@@ -0,0 +1,115 @@
+import string
+import threading
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List
+
+# 建立量測物件時先量好的字元：標題常見的全形標點與 ASCII 可見字元，其餘字元第一次出現時才量測
+CJK_PUNCTUATION = '，。、：；？！「」『』（）《》〈〉【】—…｜－～·％＋＝／'
+PRELOADED_CHARS = CJK_PUNCTUATION + string.digits + string.ascii_letters + string.punctuation + ' '
+
+class TextMeasure:
+    """快取單一字體各字元寬度的文字量測
+
+    寬度定義與原本的 get_text_width 相同：逐字以 getbbox 量測後相加，不考慮字距調整，
+    因此每個字元只需呼叫一次字體。
+    """
+
+    def __init__(self, font):
+        self.font = font
+        self._widths = {}
+        self._lock = threading.Lock()
+        self.preload(PRELOADED_CHARS)
+
+    def preload(self, chars: str) -> None:
+        for char in chars:
+            self.char_width(char)
+
+    def char_width(self, char: str) -> int:
+        width = self._widths.get(char)
+        if width is None:
+            bbox = self.font.getbbox(char)
+            width = bbox[2] - bbox[0]
+            with self._lock:
+                self._widths[char] = width
+        return width
+
+    def width(self, text: str) -> int:
+        return sum(self.char_width(char) for char in text)
+
+    def prefix_widths(self, text: str) -> List[int]:
+        """回傳長度 len(text) + 1 的累計寬度，第 i 項為 text[:i] 的寬度"""
+        widths = [0]
+        for char in text:
+            widths.append(widths[-1] + self.char_width(char))
+        return widths
+
+    def break_index(self, text: str, max_width: int, prefix: List[int] = None) -> int:
+        """回傳最小的 i（0 <= i < len(text)）使 text[:i] 寬度超過 max_width，都不超過時回傳 len(text)"""
+        if prefix is None:
+            prefix = self.prefix_widths(text)
+        # 累計寬度不會遞減，以二分搜尋取代逐一量測每個前綴
+        return bisect_right(prefix, max_width, 0, len(text))
+
+    def fits(self, text: str, max_width: int) -> bool:
+        return self.width(text) <= max_width
+
+@lru_cache(maxsize=None)
+def get_text_measure(font) -> TextMeasure:
+    # load_font 已讓同一字體只有一個物件，量測快取也隨之共用
+    return TextMeasure(font)
+
+def benchmark(font_path: str, font_size: int, max_width: int, iterations: int) -> None:
+    import time
+    from PIL import ImageFont
+
+    titles = [
+        '美國聯準會宣布維持利率不變，鮑爾：通膨仍高於目標',
+        '台積電第三季營收創歷史新高，人工智慧晶片需求強勁帶動成長',
+        'Apple 發表 iPhone 17：搭載 A19 晶片與全新相機系統',
+        '歐盟對中國電動車加徵關稅｜北京揚言反制並啟動調查',
+        '日本央行意外升息　日圓急升、亞洲股市全面下跌',
+    ]
+
+    def legacy_width(font, text):
+        width = 0
+        for char in text:
+            bbox = font.getbbox(char)
+            width += bbox[2] - bbox[0]
+        return width
+
+    def legacy_break(font, title):
+        for i in range(len(title)):
+            if legacy_width(font, title[:i]) > max_width:
+                return i
+        return len(title)
+
+    font = ImageFont.truetype(font_path, font_size)
+    measure = TextMeasure(font)
+    for title in titles:
+        assert measure.break_index(title, max_width) == legacy_break(font, title)
+
+    cases = {
+        '逐一量測前綴': lambda title: legacy_break(font, title),
+        '快取＋二分搜尋': lambda title: measure.break_index(title, max_width),
+    }
+    print(f"{'方法':<12}{'每個標題 (µs)':>16}")
+    for name, layout in cases.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for title in titles:
+                layout(title)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<12}{elapsed / (iterations * len(titles)) * 1e6:>16.1f}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="比較逐一量測前綴與快取字寬的標題換行效能")
+    parser.add_argument('--font', default='./src/assets/KosugiMaru-Regular.ttf', help='字體檔案路徑')
+    parser.add_argument('--size', type=int, default=56, help='字體大小')
+    parser.add_argument('--width', type=int, default=914, help='每行可用寬度')
+    parser.add_argument('-n', '--iterations', type=int, default=200, help='每個標題重複排版的次數')
+    args = parser.parse_args()
+
+    benchmark(args.font, args.size, args.width, args.iterations)